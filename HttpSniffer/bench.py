@@ -0,0 +1,340 @@
+"""
+Module: bench
+
+This module contains micro-benchmarks for the packet sniffer pipeline. The packets are
+synthesized in memory, so the benchmarks run without a raw socket or root privileges.
+
+Usage:
+    python bench.py
+"""
+from ctypes import Structure, c_ubyte, c_uint32, c_ushort
+import random
+import socket
+import struct
+import time
+import timeit
+import tracemalloc
+from types import SimpleNamespace
+
+from conntrack import ConnectionTable
+from decoder import PacketDecoder
+from headers import HeaderTable
+from http import HTTP
+
+SAMPLE_REQUEST = (b"GET /index.html HTTP/1.1\r\nHost: example.com\r\n"
+                  b"User-Agent: Mozilla/5.0\r\nAccept: */*\r\n\r\n")
+
+
+def build_ipv4_frame(sport, dport, payload=SAMPLE_REQUEST, vlan_ids=()):
+    """Build an Ethernet frame carrying a TCP segment over IPv4.
+
+    Args:
+        sport (int): TCP source port.
+        dport (int): TCP destination port.
+        payload (bytes, optional): TCP payload.
+        vlan_ids (tuple, optional): 802.1Q VLAN IDs to tag the frame with.
+
+    Returns:
+        bytes: The raw frame.
+    """
+    tcp = struct.pack("!HHIIBBHHH", sport, dport, 1, 0, 5 << 4, 0x18, 65535, 0, 0) + payload
+    ip = struct.pack("!BBHHHBBH4s4s", 0x45, 0, 20 + len(tcp), 1, 0, 64, 6, 0,
+                     socket.inet_aton("10.0.0.1"), socket.inet_aton("10.0.0.2")) + tcp
+    frame = b"\xaa" * 6 + b"\xbb" * 6
+    for vlan_id in vlan_ids:
+        frame += struct.pack("!HH", 0x8100, vlan_id)
+    return frame + b"\x08\x00" + ip
+
+
+class LegacyEthernet(Structure):
+    """The Ethernet header class before the decoder rewrite, with eager MAC formatting."""
+    _fields_ = [
+        ("dst", c_ubyte * 6),
+        ("src", c_ubyte * 6),
+        ("type", c_ushort)
+    ]
+
+    def __new__(cls, socket_buffer=None):
+        """Copy the header out of the buffer."""
+        return cls.from_buffer_copy(socket_buffer)
+
+    def __init__(self, socket_buffer=None):
+        """Format the MAC addresses and convert the EtherType."""
+        self.dst_mac = ":".join(["{:02x}".format(x) for x in self.dst])
+        self.src_mac = ":".join(["{:02x}".format(x) for x in self.src])
+        self.proto = socket.htons(self.type)
+
+
+class LegacyIP(Structure):
+    """The IP header class before the decoder rewrite, with eager address formatting."""
+    _fields_ = [
+        ("ihl", c_ubyte, 4),
+        ("version", c_ubyte, 4),
+        ("tos", c_ubyte),
+        ("len", c_ushort),
+        ("id", c_ushort),
+        ("offset", c_ushort),
+        ("ttl", c_ubyte),
+        ("protocol_num", c_ubyte),
+        ("sum", c_ushort),
+        ("src", c_uint32),
+        ("dst", c_uint32)
+    ]
+
+    def __new__(cls, socket_buffer=None):
+        """Copy the header out of the buffer, or return None if it is too short."""
+        try:
+            return cls.from_buffer_copy(socket_buffer)
+        except ValueError:
+            return None
+
+    def __init__(self, socket_buffer=None):
+        """Format the addresses and name the protocol."""
+        if socket_buffer:
+            self.src_address = socket.inet_ntoa(struct.pack("<L", self.src))
+            self.dst_address = socket.inet_ntoa(struct.pack("<L", self.dst))
+            self.protocol = {1: "ICMP", 6: "TCP", 17: "UDP"}.get(self.protocol_num, str(self.protocol_num))
+
+
+class LegacyTCP(Structure):
+    """The TCP header class before the decoder rewrite, converting ports with ntohs.
+
+    The data offset nibble is declared in the corrected order, so that the payload
+    handed to the parse benchmark is the same for both paths.
+    """
+    _fields_ = [
+        ("sport", c_ushort),
+        ("dport", c_ushort),
+        ("seq", c_uint32),
+        ("ack", c_uint32),
+        ("reserved", c_ubyte, 4),
+        ("offset", c_ubyte, 4),
+        ("flags", c_ubyte),
+        ("window", c_ushort),
+        ("checksum", c_ushort),
+        ("urgent_pointer", c_ushort)
+    ]
+
+    def __new__(cls, socket_buffer=None):
+        """Copy the header out of the buffer, or return None if it is too short."""
+        try:
+            return cls.from_buffer_copy(socket_buffer)
+        except ValueError:
+            return None
+
+    def __init__(self, socket_buffer):
+        """Convert the ports to host byte order."""
+        if socket_buffer:
+            self.sport = socket.ntohs(self.sport)
+            self.dport = socket.ntohs(self.dport)
+
+
+def legacy_decode(packet):
+    """Decode a frame the way the sniffer did before the table-driven decoder.
+
+    Only untagged IPv4 on port 80 is recognised; kept here as the baseline, on copies
+    of the header classes of that time.
+
+    Args:
+        packet (bytes): Raw frame.
+
+    Returns:
+        bytes: The TCP payload, or None.
+    """
+    LegacyEthernet(packet[:14])
+    ip_header = LegacyIP(packet[14:34])
+    if ip_header and ip_header.protocol_num == 6:
+        ip_header_length = ip_header.ihl * 4
+        tcp_header = LegacyTCP(packet[14 + ip_header_length:14 + ip_header_length + 20])
+        if tcp_header and (tcp_header.sport == 80 or tcp_header.dport == 80):
+            return packet[14 + ip_header_length + tcp_header.offset * 4:]
+    return None
+
+
+def bench_decoder(number=100000):
+    """Compare the legacy fixed-offset parsing with PacketDecoder on IPv4 traffic.
+
+    The legacy function runs on copies of the original header classes, so the numbers
+    compare the complete header path before and after the rewrite.
+
+    Args:
+        number (int, optional): Packets decoded per measurement.
+    """
+    decoder = PacketDecoder()
+    cases = [
+        ("ipv4 http", build_ipv4_frame(40000, 80)),
+        ("ipv4 other port", build_ipv4_frame(40000, 443)),
+        ("vlan ipv4 http", build_ipv4_frame(40000, 80, vlan_ids=(100,))),
+    ]
+    print("Decoder (microseconds per packet):")
+    for name, packet in cases:
+        legacy = min(timeit.repeat(lambda: legacy_decode(packet), number=number, repeat=7))
+        current = min(timeit.repeat(lambda: decoder.decode(packet), number=number, repeat=7))
+        print(f"  {name:<18} legacy {legacy / number * 1e6:6.2f}   decoder {current / number * 1e6:6.2f}")
+
+    packet = cases[0][1]
+    number //= 10
+    legacy = min(timeit.repeat(lambda: HTTP(legacy_decode(packet)), number=number, repeat=7))
+    current = min(timeit.repeat(lambda: HTTP(decoder.decode(packet)[3]), number=number, repeat=7))
+    print(f"  {'ipv4 http + parse':<18} legacy {legacy / number * 1e6:6.2f}   decoder {current / number * 1e6:6.2f}")
+
+
+def build_capture(count=60000, seed=1):
+    """Synthesize a realistic mix of HTTP requests and responses.
+
+    A few hundred clients with their own user agent and session cookie talk to a
+    handful of hosts; dates, lengths, paths, referers and request IDs vary per message.
+
+    Args:
+        count (int, optional): Number of messages.
+        seed (int, optional): Random seed, so runs are comparable.
+
+    Returns:
+        list: Raw HTTP messages.
+    """
+    rng = random.Random(seed)
+    agents = [f"Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 Chrome/{major}.0.0.0 Safari/537.36"
+              for major in range(110, 122)] + ["curl/8.4.0", "python-requests/2.31.0"]
+    hosts = [f"api{n}.example.com" for n in range(8)] + ["www.example.org", "cdn.example.net"]
+    clients = [(rng.choice(agents), f"session={rng.getrandbits(128):032x}; theme=dark") for _ in range(300)]
+    messages = []
+    for n in range(count):
+        agent, cookie = rng.choice(clients)
+        request_id = f"{rng.getrandbits(128):032x}"
+        if n % 2 == 0:
+            host = rng.choice(hosts)
+            messages.append((f"GET /items/{rng.randrange(100000)} HTTP/1.1\r\n"
+                             f"Host: {host}\r\n"
+                             f"User-Agent: {agent}\r\n"
+                             "Accept: application/json\r\n"
+                             "Accept-Encoding: gzip, deflate, br\r\n"
+                             "Accept-Language: en-US,en;q=0.9\r\n"
+                             f"Referer: https://{host}/items/{rng.randrange(100000)}\r\n"
+                             f"X-Request-Id: {request_id}\r\n"
+                             f"Cookie: {cookie}\r\n"
+                             "Connection: keep-alive\r\n\r\n").encode())
+        else:
+            messages.append(("HTTP/1.1 200 OK\r\n"
+                             f"Date: Mon, 19 Oct 2026 10:{n // 60 % 60:02d}:{n % 60:02d} GMT\r\n"
+                             "Server: nginx/1.24.0\r\n"
+                             f"X-Request-Id: {request_id}\r\n"
+                             "Content-Type: application/json\r\n"
+                             f"Content-Length: {rng.randrange(100, 5000)}\r\n"
+                             "Cache-Control: no-cache\r\n"
+                             "Vary: Accept-Encoding\r\n"
+                             "Connection: keep-alive\r\n\r\n").encode())
+    return messages
+
+
+def legacy_headers(raw_data):
+    """Parse headers into a fresh dictionary, as HTTP did before the header table.
+
+    Args:
+        raw_data (bytes): Raw HTTP message.
+
+    Returns:
+        dict: Lowercased header names mapped to values.
+    """
+    headers = {}
+    headers_str = raw_data[:raw_data.find(b'\r\n\r\n')].decode('utf-8', errors='ignore')
+    for line in headers_str.split('\r\n')[1:]:
+        if ': ' in line:
+            key, value = line.split(': ', 1)
+            headers[key.lower()] = value
+    return headers
+
+
+def measure_retained(parse, batches):
+    """Measure the memory retained by each batch of parsed messages.
+
+    Args:
+        parse (callable): Parses one message into the object to keep.
+        batches (list): Lists of raw messages, parsed in order.
+
+    Returns:
+        list: Retained bytes added by each batch.
+    """
+    results = []
+    retained = []
+    tracemalloc.start()
+    try:
+        previous = tracemalloc.get_traced_memory()[0]
+        for batch in batches:
+            results.extend(parse(message) for message in batch)
+            current = tracemalloc.get_traced_memory()[0]
+            retained.append(current - previous)
+            previous = current
+    finally:
+        tracemalloc.stop()
+    del results
+    return retained
+
+
+def bench_header_memory(count=60000, max_entries=32):
+    """Compare header memory of per-message dictionaries and the shared header table.
+
+    The capture is measured in two halves. The default table never fills on this mix;
+    a table limited to max_entries does, which shows the per-message cost once every
+    new pair has to be kept as a literal.
+
+    Args:
+        count (int, optional): Number of messages in the synthetic capture.
+        max_entries (int, optional): Size of the deliberately small table.
+    """
+    messages = build_capture(count)
+    half = count // 2
+    batches = [messages[:half], messages[half:]]
+    print(f"Header memory ({count} messages, bytes/message for first half / second half):")
+    legacy = measure_retained(legacy_headers, batches)
+    print(f"  per-message dict      {legacy[0] / half:8.1f} / {legacy[1] / (count - half):8.1f}")
+    for table in (HeaderTable(), HeaderTable(max_entries=max_entries)):
+        current = measure_retained(lambda message: HTTP(message, header_table=table).header_refs, batches)
+        print(f"  header table {table.max_entries:>5}  {current[0] / half:8.1f} / {current[1] / (count - half):8.1f}"
+              f"   ({len(table)} entries{', full' if len(table) >= table.max_entries else ''})")
+
+
+def bench_conntrack(flows=200000, flows_per_second=5000):
+    """Measure connection tracking cost for many short-lived flows.
+
+    Each flow is a full handshake, one request, one response and a FIN exchange,
+    replayed on a simulated clock so that expiry runs as it would live.
+
+    Args:
+        flows (int, optional): Number of flows.
+        flows_per_second (int, optional): Simulated arrival rate.
+    """
+    table = ConnectionTable(max_connections=100000)
+    segments = []
+    for n in range(flows):
+        client = SimpleNamespace(src_address=f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}",
+                                 dst_address="192.0.2.1")
+        server = SimpleNamespace(src_address=client.dst_address, dst_address=client.src_address)
+        sport = 1024 + n % 60000
+        start = n / flows_per_second
+        for offset, ip, flags, seq, length in ((0.000, client, 0x02, 0, 0), (0.001, server, 0x12, 0, 0),
+                                               (0.002, client, 0x10, 1, 0), (0.002, client, 0x18, 1, 300),
+                                               (0.010, server, 0x18, 1, 1200), (0.011, client, 0x11, 301, 0),
+                                               (0.012, server, 0x11, 1201, 0)):
+            from_client = ip is client
+            tcp = SimpleNamespace(sport=sport if from_client else 80, dport=80 if from_client else sport,
+                                  flags=flags, seq=seq, ack=0)
+            segments.append((ip, tcp, length, start + offset))
+
+    started = time.perf_counter()
+    for ip, tcp, length, now in segments:
+        table.update(ip, tcp, length, now)
+    elapsed = time.perf_counter() - started
+    print(f"Connection tracking ({flows} flows, {len(segments)} packets):")
+    print(f"  {elapsed / len(segments) * 1e6:.2f} microseconds/packet, {len(table)} tracked, "
+          f"{table.expired} expired, {table.evicted} evicted")
+
+
+def main():
+    """Run all benchmarks."""
+    bench_decoder()
+    bench_header_memory()
+    bench_conntrack()
+
+
+if __name__ == "__main__":
+    main()
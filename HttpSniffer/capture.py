@@ -0,0 +1,180 @@
+"""
+Module: capture
+
+This module defines the capture policy applied to HTTP messages before they are stored.
+The policy bounds the memory held by each message: bodies can be truncated, sampled
+from their head and tail, skipped by content type, or replaced by a hash and length.
+Whatever is removed is recorded on the message so the UI can show what was elided.
+
+Each message is parsed from a single captured TCP segment, so a body is never longer than
+one frame: at most 65535 bytes with segmentation offload, and usually an MTU or less. The
+hash and skip decisions therefore go by the length the message declares, and a body that
+continues beyond its first segment is always recorded as partially captured.
+"""
+import hashlib
+
+DEFAULT_MAX_BODY_BYTES = 16 * 1024
+MEDIA_CONTENT_TYPES = ("image/", "video/", "audio/")
+
+
+def parse_size(value):
+    """Parse a byte size with an optional K, M or G suffix.
+
+    Args:
+        value (str): Size such as "4096", "64K" or "1M".
+
+    Returns:
+        int: The size in bytes.
+
+    Raises:
+        ValueError: If the value is not a valid non-negative size.
+    """
+    multipliers = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    value = value.strip().upper().removesuffix("B").removesuffix("I")
+    multiplier = multipliers.get(value[-1:], 1)
+    if multiplier != 1:
+        value = value[:-1]
+    size = int(value) * multiplier
+    if size < 0:
+        raise ValueError(f"invalid size: {value}")
+    return size
+
+
+def declared_length(http, captured_length):
+    """Return the body length announced by the Content-Length header.
+
+    Args:
+        http (HTTP): The parsed message.
+        captured_length (int): Body bytes present in the captured segment.
+
+    Returns:
+        int: The Content-Length value, or captured_length if the header is missing,
+            invalid or smaller than what was captured.
+    """
+    try:
+        length = int(http.get_header('content-length', ''))
+    except ValueError:
+        return captured_length
+    return max(length, captured_length)
+
+
+class CapturePolicy:
+    """Decides how much of each HTTP body is kept in memory.
+
+    The checks run in order: content types listed in skip_content_types drop the body,
+    bodies declared larger than hash_threshold keep only their SHA-256 and length, and
+    captured bodies above max_body_bytes are cut down to their first head_bytes and last
+    tail_bytes. A body declared longer than what was captured is marked partial.
+
+    Attributes:
+        max_body_bytes (int): Largest body kept in full.
+        head_bytes (int): Bytes kept from the start of an oversized body.
+        tail_bytes (int): Bytes kept from the end of an oversized body.
+        skip_content_types (tuple): Content types whose bodies are dropped. Entries
+            ending in "/" match every subtype.
+        hash_threshold (int): Bodies declared larger than this keep only a hash, or None.
+        keep_raw_data (bool): Whether to keep the raw message bytes after parsing.
+    """
+
+    def __init__(self, max_body_bytes=DEFAULT_MAX_BODY_BYTES, head_bytes=None, tail_bytes=0,
+                 skip_content_types=(), hash_threshold=None, keep_raw_data=False):
+        """Initialize the capture policy.
+
+        Args:
+            max_body_bytes (int, optional): Largest body kept in full. Defaults to 16 KiB.
+            head_bytes (int, optional): Bytes kept from the start of an oversized body.
+                Defaults to max_body_bytes minus tail_bytes.
+            tail_bytes (int, optional): Bytes kept from the end of an oversized body.
+                Defaults to 0.
+            skip_content_types (iterable, optional): Content types whose bodies are dropped.
+            hash_threshold (int, optional): Bodies declared larger than this keep only a hash.
+            keep_raw_data (bool, optional): Keep the raw message bytes. Defaults to False.
+        """
+        if head_bytes is None:
+            head_bytes = max(max_body_bytes - tail_bytes, 0)
+        self.max_body_bytes = max_body_bytes
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.skip_content_types = tuple(content_type.lower() for content_type in skip_content_types)
+        self.hash_threshold = hash_threshold
+        self.keep_raw_data = keep_raw_data
+
+    def is_skipped(self, content_type):
+        """Check whether a content type is excluded from capture.
+
+        Args:
+            content_type (str): Value of the Content-Type header, or None.
+
+        Returns:
+            bool: True if bodies of this type are dropped.
+        """
+        if not content_type or not self.skip_content_types:
+            return False
+        media_type = content_type.split(';', 1)[0].strip().lower()
+        for skipped in self.skip_content_types:
+            if media_type == skipped or (skipped.endswith('/') and media_type.startswith(skipped)):
+                return True
+        return False
+
+    def apply(self, http):
+        """Apply the policy to a parsed HTTP message in place.
+
+        Sets ``http.elision`` to a dict describing what was removed, or leaves it None
+        when the body was kept in full. original_length is the Content-Length when the
+        message declares one, while captured_length counts the bytes actually seen; the
+        hash and the kept bytes only ever cover the captured bytes. Segments without any
+        body bytes are left alone, since HEAD and 304 responses declare a length they
+        never send.
+
+        Args:
+            http (HTTP): The parsed message.
+        """
+        if not self.keep_raw_data:
+            http.raw_data = None
+
+        payload = http.payload
+        if not payload:
+            return
+
+        length = len(payload)
+        original_length = declared_length(http, length)
+        if self.is_skipped(http.get_header('content-type')):
+            http.payload = None
+            http.elision = {'reason': 'content-type', 'original_length': original_length,
+                            'captured_length': length, 'kept': 0}
+        elif self.hash_threshold is not None and original_length > self.hash_threshold:
+            http.payload = None
+            http.elision = {'reason': 'hashed', 'original_length': original_length,
+                            'captured_length': length, 'kept': 0,
+                            'sha256': hashlib.sha256(payload).hexdigest()}
+        elif length > self.max_body_bytes:
+            head = payload[:self.head_bytes]
+            tail = payload[length - self.tail_bytes:] if self.tail_bytes else b''
+            http.payload = head + tail
+            http.elision = {'reason': 'sampled' if tail else 'truncated',
+                            'original_length': original_length, 'captured_length': length,
+                            'kept': len(head) + len(tail), 'head_bytes': len(head), 'tail_bytes': len(tail)}
+        elif original_length > length:
+            http.elision = {'reason': 'partial', 'original_length': original_length,
+                            'captured_length': length, 'kept': length}
+
+
+def describe_elision(elision):
+    """Build a human-readable note for an elided body.
+
+    Args:
+        elision (dict): The ``elision`` record set by CapturePolicy.apply.
+
+    Returns:
+        str: A one-line description of what was elided.
+    """
+    length = elision['original_length']
+    captured = elision.get('captured_length', length)
+    reason = elision['reason']
+    if reason == 'content-type':
+        return f"[Body of {length} bytes not captured (content type)]"
+    if reason == 'hashed':
+        return f"[Body of {length} bytes not captured, sha256 of {captured} captured bytes={elision['sha256']}]"
+    if reason == 'partial':
+        return f"[Only the first {captured} of {length} bytes were in the captured segment]"
+    return f"[{length - elision['kept']} of {length} bytes elided]"
@@ -0,0 +1,414 @@
+"""
+Module: conntrack
+
+This module tracks TCP connections seen by the sniffer. Connections are keyed on their
+4-tuple and kept as compact slotted entries holding per-direction byte, packet and
+retransmission counters, the handshake round-trip time and the number of HTTP requests
+carried (keep-alive reuse).
+
+Expiry uses a hashed timer wheel: every connection sits in one bucket, and buckets are
+only inspected as time moves past them, so each packet costs O(1) regardless of how many
+connections are tracked. The table is bounded; when full, the least recently seen
+connection is evicted.
+"""
+import threading
+
+from decoder import DEFAULT_HTTP_PORTS
+from tcp import TCP_ACK, TCP_FIN, TCP_RST, TCP_SYN
+
+SYN_SENT = "SYN_SENT"
+SYN_RECEIVED = "SYN_RECEIVED"
+ESTABLISHED = "ESTABLISHED"
+FIN_WAIT = "FIN_WAIT"
+CLOSED = "CLOSED"
+RESET = "RESET"
+
+DEFAULT_MAX_CONNECTIONS = 65536
+DEFAULT_HANDSHAKE_TIMEOUT = 30.0
+DEFAULT_IDLE_TIMEOUT = 300.0
+DEFAULT_CLOSED_TIMEOUT = 10.0
+
+
+def seq_after(a, b):
+    """Compare two TCP sequence numbers with wrap-around.
+
+    Args:
+        a (int): Sequence number.
+        b (int): Sequence number.
+
+    Returns:
+        bool: True if a comes strictly after b.
+    """
+    return 0 < ((a - b) & 0xFFFFFFFF) < 0x80000000
+
+
+class Connection:
+    """A tracked TCP connection.
+
+    The client is the side that sent the SYN or, when the handshake was missed, the
+    endpoint that is not on an HTTP port.
+
+    Attributes:
+        key (tuple): (client, client_port, server, server_port).
+        state (str): One of SYN_SENT, SYN_RECEIVED, ESTABLISHED, FIN_WAIT, CLOSED, RESET.
+        first_seen (float): Time of the first packet.
+        last_seen (float): Time of the latest packet.
+        deadline (float): Time at which the connection expires if idle.
+        timer_tick (int): Tick of the timer wheel bucket holding the connection.
+        syn_time (float): Time of the client SYN, or None.
+        rtt (float): Handshake round-trip time in seconds, or None.
+        client_bytes (int): Payload bytes sent by the client.
+        server_bytes (int): Payload bytes sent by the server.
+        client_packets (int): Packets sent by the client.
+        server_packets (int): Packets sent by the server.
+        client_next_seq (int): Next expected client sequence number, or None.
+        server_next_seq (int): Next expected server sequence number, or None.
+        client_fin (bool): Whether the client sent a FIN.
+        server_fin (bool): Whether the server sent a FIN.
+        retransmissions (int): Retransmitted segments in either direction.
+        retransmitted (bool): Whether the latest segment was a retransmission.
+        requests (int): HTTP requests carried by the connection.
+        sampled (bool): Whether the messages of the connection are decoded, decided by
+            the overload controller when the connection is first seen, or None.
+        sample_rate (float): Flow sampling rate in effect when that decision was taken.
+    """
+    __slots__ = (
+        "key", "state", "first_seen", "last_seen", "deadline", "timer_tick", "syn_time", "rtt",
+        "client_bytes", "server_bytes", "client_packets", "server_packets",
+        "client_next_seq", "server_next_seq", "client_fin", "server_fin",
+        "retransmissions", "retransmitted", "requests", "sampled", "sample_rate",
+    )
+
+    def __init__(self, key, now):
+        """Initialize a connection.
+
+        Args:
+            key (tuple): (client, client_port, server, server_port).
+            now (float): Time of the first packet.
+        """
+        self.key = key
+        self.state = ESTABLISHED
+        self.first_seen = now
+        self.last_seen = now
+        self.deadline = now
+        self.timer_tick = None
+        self.syn_time = None
+        self.rtt = None
+        self.client_bytes = 0
+        self.server_bytes = 0
+        self.client_packets = 0
+        self.server_packets = 0
+        self.client_next_seq = None
+        self.server_next_seq = None
+        self.client_fin = False
+        self.server_fin = False
+        self.retransmissions = 0
+        self.retransmitted = False
+        self.requests = 0
+        self.sampled = None
+        self.sample_rate = 1.0
+
+    @property
+    def total_bytes(self):
+        """int: Payload bytes in both directions."""
+        return self.client_bytes + self.server_bytes
+
+    def __str__(self):
+        """
+        Returns a one-line summary of the connection.
+
+        Returns:
+            str: Endpoints, state and counters.
+        """
+        client, client_port, server, server_port = self.key
+        rtt = f"{self.rtt * 1000:.1f}ms" if self.rtt is not None else "-"
+        return (f"{client}:{client_port} -> {server}:{server_port} {self.state} "
+                f"bytes {self.client_bytes}/{self.server_bytes} "
+                f"packets {self.client_packets}/{self.server_packets} "
+                f"rtt {rtt} retrans {self.retransmissions} requests {self.requests}")
+
+
+class ConnectionTable:
+    """A bounded table of TCP connections with timer-wheel expiry.
+
+    Attributes:
+        connections (dict): Maps a connection key to its Connection, least recently
+            seen first.
+        wheel (list): Timer wheel buckets, each a set of connections.
+        tick (float): Seconds covered by one bucket.
+        current_tick (int): The last tick the wheel was advanced to.
+        max_connections (int): Maximum number of tracked connections.
+        http_ports (frozenset): Server ports, used to tell the client from the server
+            when the handshake was missed.
+        handshake_timeout (float): Idle timeout before the handshake completes.
+        idle_timeout (float): Idle timeout of established connections.
+        closed_timeout (float): Time closed or reset connections are kept.
+        expired (int): Connections removed by timeout.
+        evicted (int): Connections removed because the table was full.
+        table_lock (threading.Lock): A threading lock for thread-safe operations.
+    """
+
+    def __init__(self, max_connections=DEFAULT_MAX_CONNECTIONS, handshake_timeout=DEFAULT_HANDSHAKE_TIMEOUT,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT, closed_timeout=DEFAULT_CLOSED_TIMEOUT,
+                 tick=1.0, wheel_size=512, http_ports=DEFAULT_HTTP_PORTS):
+        """Initialize the connection table.
+
+        Args:
+            max_connections (int, optional): Maximum number of tracked connections.
+            handshake_timeout (float, optional): Idle timeout before the handshake completes.
+            idle_timeout (float, optional): Idle timeout of established connections.
+            closed_timeout (float, optional): Time closed or reset connections are kept.
+            tick (float, optional): Seconds covered by one wheel bucket. Defaults to 1.0.
+            wheel_size (int, optional): Number of wheel buckets. Defaults to 512.
+            http_ports (iterable, optional): Server ports. Defaults to DEFAULT_HTTP_PORTS.
+        """
+        self.connections = {}
+        self.wheel = [set() for _ in range(wheel_size)]
+        self.tick = tick
+        self.current_tick = None
+        self.max_connections = max_connections
+        self.http_ports = frozenset(http_ports)
+        self.handshake_timeout = handshake_timeout
+        self.idle_timeout = idle_timeout
+        self.closed_timeout = closed_timeout
+        self.expired = 0
+        self.evicted = 0
+        self.table_lock = threading.Lock()
+
+    def __len__(self):
+        """Return the number of tracked connections."""
+        return len(self.connections)
+
+    def update(self, ip_header, tcp_header, payload_length, now):
+        """Account one TCP segment to its connection.
+
+        A client SYN for a connection that is closing or closed means the client port
+        was reused, so the old entry is replaced by a new connection.
+
+        Args:
+            ip_header (IP or IPv6): Network header of the packet.
+            tcp_header (TCP): TCP header of the packet.
+            payload_length (int): Length of the TCP payload.
+            now (float): Monotonic capture time.
+
+        Returns:
+            Connection: The connection the segment belongs to.
+        """
+        src = ip_header.src_address
+        dst = ip_header.dst_address
+        sport = tcp_header.sport
+        dport = tcp_header.dport
+        flags = tcp_header.flags
+
+        with self.table_lock:
+            self.advance(now)
+            connections = self.connections
+            # Popping and reinserting keeps the dict ordered by last packet, so the
+            # first key is always the least recently seen connection.
+            key = (src, sport, dst, dport)
+            conn = connections.pop(key, None)
+            from_client = True
+            if conn is None:
+                key = (dst, dport, src, sport)
+                conn = connections.pop(key, None)
+                from_client = False
+            if conn is not None and flags & TCP_SYN and not flags & TCP_ACK \
+                    and conn.state in (FIN_WAIT, CLOSED, RESET):
+                self.remove(conn)
+                conn = None
+            if conn is not None:
+                connections[key] = conn
+            else:
+                if flags & TCP_SYN:
+                    from_client = not flags & TCP_ACK
+                else:
+                    from_client = sport not in self.http_ports or dport in self.http_ports
+                key = (src, sport, dst, dport) if from_client else (dst, dport, src, sport)
+                conn = self.create(key, now)
+                if flags & TCP_SYN:
+                    conn.state = SYN_SENT if from_client else SYN_RECEIVED
+
+            conn.last_seen = now
+            self.track_segment(conn, from_client, tcp_header, flags, payload_length, now)
+
+            if conn.state in (CLOSED, RESET):
+                timeout = self.closed_timeout
+            elif conn.state in (SYN_SENT, SYN_RECEIVED):
+                timeout = self.handshake_timeout
+            else:
+                timeout = self.idle_timeout
+            conn.deadline = now + timeout
+            deadline_tick = int(conn.deadline / self.tick)
+            if conn.timer_tick is None or deadline_tick < conn.timer_tick:
+                self.schedule(conn, deadline_tick)
+            return conn
+
+    def track_segment(self, conn, from_client, tcp_header, flags, payload_length, now):
+        """Update the state machine and counters of a connection.
+
+        Args:
+            conn (Connection): The connection.
+            from_client (bool): Whether the client sent the segment.
+            tcp_header (TCP): TCP header of the segment.
+            flags (int): TCP flags.
+            payload_length (int): Length of the TCP payload.
+            now (float): Monotonic capture time.
+        """
+        seq_length = payload_length + (1 if flags & TCP_SYN else 0) + (1 if flags & TCP_FIN else 0)
+        if from_client:
+            conn.client_packets += 1
+            conn.client_bytes += payload_length
+            next_seq = conn.client_next_seq
+        else:
+            conn.server_packets += 1
+            conn.server_bytes += payload_length
+            next_seq = conn.server_next_seq
+
+        seq_end = (tcp_header.seq + seq_length) & 0xFFFFFFFF
+        conn.retransmitted = bool(seq_length) and next_seq is not None and not seq_after(seq_end, next_seq)
+        if conn.retransmitted:
+            conn.retransmissions += 1
+        elif next_seq is None or seq_after(seq_end, next_seq):
+            if from_client:
+                conn.client_next_seq = seq_end
+            else:
+                conn.server_next_seq = seq_end
+
+        if flags & TCP_RST:
+            conn.state = RESET
+        elif flags & TCP_SYN:
+            if from_client and not flags & TCP_ACK:
+                if conn.syn_time is None:
+                    conn.syn_time = now
+                conn.state = SYN_SENT
+            elif not from_client and flags & TCP_ACK and conn.state == SYN_SENT:
+                conn.state = SYN_RECEIVED
+        elif flags & TCP_FIN:
+            if from_client:
+                conn.client_fin = True
+            else:
+                conn.server_fin = True
+            conn.state = CLOSED if conn.client_fin and conn.server_fin else FIN_WAIT
+        elif conn.state == SYN_RECEIVED and from_client and flags & TCP_ACK:
+            conn.state = ESTABLISHED
+            if conn.syn_time is not None:
+                conn.rtt = now - conn.syn_time
+        elif conn.state == SYN_SENT and payload_length:
+            conn.state = ESTABLISHED
+
+    def note_request(self, conn):
+        """Count an HTTP request carried by a connection.
+
+        Requests in retransmitted segments were already counted and are ignored.
+
+        Args:
+            conn (Connection): The connection.
+        """
+        if not conn.retransmitted:
+            conn.requests += 1
+
+    def create(self, key, now):
+        """Add a new connection, evicting the least recently seen one if the table is full.
+
+        The caller schedules the connection once its deadline is known.
+
+        Args:
+            key (tuple): (client, client_port, server, server_port).
+            now (float): Monotonic capture time.
+
+        Returns:
+            Connection: The new connection.
+        """
+        if len(self.connections) >= self.max_connections:
+            least_recent = self.connections[next(iter(self.connections))]
+            self.remove(least_recent)
+            self.evicted += 1
+        conn = Connection(key, now)
+        self.connections[key] = conn
+        return conn
+
+    def remove(self, conn):
+        """Remove a connection from the table and the timer wheel.
+
+        Args:
+            conn (Connection): The connection.
+        """
+        self.connections.pop(conn.key, None)
+        self.wheel[conn.timer_tick % len(self.wheel)].discard(conn)
+
+    def schedule(self, conn, tick):
+        """Place a connection in the wheel bucket for a tick, moving it if already scheduled.
+
+        Ticks beyond one wheel revolution are clamped; the connection is simply checked
+        again when that bucket comes round.
+
+        Args:
+            conn (Connection): The connection.
+            tick (int): The tick at which the connection should be checked next.
+        """
+        wheel_size = len(self.wheel)
+        if conn.timer_tick is not None:
+            self.wheel[conn.timer_tick % wheel_size].discard(conn)
+        conn.timer_tick = min(max(tick, self.current_tick + 1), self.current_tick + wheel_size - 1)
+        self.wheel[conn.timer_tick % wheel_size].add(conn)
+
+    def advance(self, now):
+        """Move the timer wheel forward and drop expired connections.
+
+        Connections whose deadline moved since they were scheduled are re-scheduled
+        instead of dropped, so refreshing a connection on every packet costs nothing.
+
+        Args:
+            now (float): Monotonic capture time.
+        """
+        now_tick = int(now / self.tick)
+        if self.current_tick is None:
+            self.current_tick = now_tick
+            return
+        if now_tick <= self.current_tick:
+            return
+        wheel_size = len(self.wheel)
+        first_tick = max(self.current_tick + 1, now_tick - wheel_size + 1)
+        self.current_tick = now_tick
+        for tick in range(first_tick, now_tick + 1):
+            slot = tick % wheel_size
+            bucket = self.wheel[slot]
+            if not bucket:
+                continue
+            self.wheel[slot] = set()
+            for conn in bucket:
+                if conn.deadline <= now:
+                    del self.connections[conn.key]
+                    self.expired += 1
+                else:
+                    conn.timer_tick = None
+                    self.schedule(conn, int(conn.deadline / self.tick))
+
+    def expire(self, now):
+        """Drop connections that have been idle past their timeout.
+
+        Args:
+            now (float): Monotonic time.
+        """
+        with self.table_lock:
+            self.advance(now)
+
+    def top(self, count=10, key="bytes"):
+        """List the largest or slowest connections.
+
+        Args:
+            count (int, optional): Number of connections to return. Defaults to 10.
+            key (str, optional): "bytes" to sort by total payload bytes, or "latency"
+                to sort by handshake RTT. Defaults to "bytes".
+
+        Returns:
+            list: Up to count Connection objects, highest first.
+        """
+        with self.table_lock:
+            connections = list(self.connections.values())
+        if key == "latency":
+            connections = [conn for conn in connections if conn.rtt is not None]
+            sort_key = lambda conn: conn.rtt
+        else:
+            sort_key = lambda conn: conn.total_bytes
+        return sorted(connections, key=sort_key, reverse=True)[:count]
@@ -0,0 +1,194 @@
+"""
+Module: decoder
+
+This module implements the table-driven link and network layer decoder used by the
+packet sniffer. It strips 802.1Q/802.1ad VLAN tags (including stacked QinQ tags),
+dispatches on the EtherType to an IPv4 or IPv6 decoder, skips IPv4 options and IPv6
+extension headers, and hands back the TCP segment when it belongs to an HTTP port.
+
+Untagged IPv4 frames take a short fast path that validates the IPv4 header with a single
+struct unpack; the IP and Ethernet header objects are only built for packets that are kept.
+"""
+import struct
+
+from ether import Ethernet
+from ip import IP, IPv6
+from tcp import TCP
+
+ETH_HEADER_LEN = 14
+ETH_P_IP = 0x0800
+ETH_P_IPV6 = 0x86DD
+ETH_P_8021Q = 0x8100
+ETH_P_8021AD = 0x88A8
+ETH_P_QINQ = 0x9100
+VLAN_TPIDS = frozenset((ETH_P_8021Q, ETH_P_8021AD, ETH_P_QINQ))
+MAX_VLAN_TAGS = 4
+
+IPPROTO_TCP = 6
+IPV4_FIELDS = struct.Struct("!BxH2xHxB")
+IPV6_HEADER_LEN = 40
+IPV6_FRAGMENT = 44
+IPV6_AUTH = 51
+IPV6_EXTENSION_HEADERS = frozenset((0, 43, IPV6_FRAGMENT, IPV6_AUTH, 60, 135, 139, 140))
+MAX_IPV6_EXTENSION_HEADERS = 8
+
+DEFAULT_HTTP_PORTS = frozenset((80, 8000, 8008, 8080, 8888))
+
+
+def parse_ports(value):
+    """Parse a comma-separated list of port numbers.
+
+    Args:
+        value (str): Port list such as "80,8080".
+
+    Returns:
+        frozenset: The parsed port numbers.
+
+    Raises:
+        ValueError: If an entry is not a valid port number.
+    """
+    ports = frozenset(int(port) for port in value.split(',') if port.strip())
+    for port in ports:
+        if not 0 < port < 65536:
+            raise ValueError(f"invalid port: {port}")
+    return ports
+
+
+class PacketDecoder:
+    """Decodes raw frames down to the TCP payload of HTTP traffic.
+
+    Attributes:
+        http_ports (frozenset): TCP ports treated as HTTP, checked on either side.
+        network_decoders (dict): Maps an EtherType to the method decoding that
+            network layer.
+    """
+
+    def __init__(self, http_ports=DEFAULT_HTTP_PORTS):
+        """Initialize the decoder.
+
+        Args:
+            http_ports (iterable, optional): TCP ports treated as HTTP.
+                Defaults to DEFAULT_HTTP_PORTS.
+        """
+        self.http_ports = frozenset(http_ports)
+        self.network_decoders = {
+            ETH_P_IP: self.decode_ipv4,
+            ETH_P_IPV6: self.decode_ipv6,
+        }
+
+    def decode(self, packet):
+        """Decode a raw Ethernet frame.
+
+        Args:
+            packet (bytes): Raw frame as read from the packet socket.
+
+        Returns:
+            tuple: (ethernet, ip, tcp, payload) for TCP segments on an HTTP port,
+                or None for anything else.
+        """
+        if packet[12:14] == b'\x08\x00':
+            if len(packet) < 34:
+                return None
+            version_ihl, total_length, fragment, protocol = IPV4_FIELDS.unpack_from(packet, ETH_HEADER_LEN)
+            if not 0x45 <= version_ihl <= 0x4F or protocol != IPPROTO_TCP or fragment & 0x1FFF:
+                return None
+            ip_header = None
+            tcp_offset = ETH_HEADER_LEN + (version_ihl & 0x0F) * 4
+            end = ETH_HEADER_LEN + total_length if total_length else len(packet)
+            vlan_ids = None
+        else:
+            if len(packet) < ETH_HEADER_LEN:
+                return None
+            ethertype = (packet[12] << 8) | packet[13]
+            offset = ETH_HEADER_LEN
+            vlan_ids = []
+            while ethertype in VLAN_TPIDS:
+                if len(vlan_ids) == MAX_VLAN_TAGS or len(packet) < offset + 4:
+                    return None
+                vlan_ids.append(((packet[offset] << 8) | packet[offset + 1]) & 0x0FFF)
+                ethertype = (packet[offset + 2] << 8) | packet[offset + 3]
+                offset += 4
+            network_decoder = self.network_decoders.get(ethertype)
+            if network_decoder is None:
+                return None
+            ip_header, tcp_offset, end = network_decoder(packet, offset)
+            if ip_header is None:
+                return None
+
+        # The header classes are big-endian and need no conversion, so from_buffer_copy
+        # builds them directly instead of slicing and going through their constructors.
+        if len(packet) < tcp_offset + 20:
+            return None
+        tcp_header = TCP.from_buffer_copy(packet, tcp_offset)
+        if tcp_header.offset < 5:
+            return None
+        if tcp_header.sport not in self.http_ports and tcp_header.dport not in self.http_ports:
+            return None
+
+        if ip_header is None:
+            ip_header = IP.from_buffer_copy(packet, ETH_HEADER_LEN)
+        ethernet_header = Ethernet.from_buffer_copy(packet)
+        if vlan_ids:
+            ethernet_header.vlan_ids = tuple(vlan_ids)
+        payload = packet[tcp_offset + tcp_header.offset * 4:end]
+        return ethernet_header, ip_header, tcp_header, payload
+
+    def decode_ipv4(self, packet, offset):
+        """Decode an IPv4 header, honouring the header length for options.
+
+        Untagged frames are handled by the equivalent inlined checks in decode().
+
+        Args:
+            packet (bytes): Raw frame.
+            offset (int): Offset of the IPv4 header within the frame.
+
+        Returns:
+            tuple: (ip_header, tcp_offset, end). ip_header is None unless the packet
+                carries the first (or only) fragment of a TCP segment.
+        """
+        ip_header = IP(packet[offset:offset + 20])
+        if ip_header is None or ip_header.version != 4 or ip_header.protocol_num != IPPROTO_TCP \
+                or ip_header.ihl < 5:
+            return None, 0, 0
+        if packet[offset + 6] & 0x1F or packet[offset + 7]:
+            return None, 0, 0
+        total_length = (packet[offset + 2] << 8) | packet[offset + 3]
+        end = offset + total_length if total_length else len(packet)
+        return ip_header, offset + ip_header.ihl * 4, end
+
+    def decode_ipv6(self, packet, offset):
+        """Decode an IPv6 header and walk its extension header chain.
+
+        Args:
+            packet (bytes): Raw frame.
+            offset (int): Offset of the IPv6 header within the frame.
+
+        Returns:
+            tuple: (ip_header, tcp_offset, end). ip_header is None unless the chain
+                ends in TCP within an unfragmented or first-fragment packet.
+        """
+        ip_header = IPv6(packet[offset:offset + IPV6_HEADER_LEN])
+        if ip_header is None:
+            return None, 0, 0
+        end = offset + IPV6_HEADER_LEN + ip_header.payload_len if ip_header.payload_len else len(packet)
+        next_header = ip_header.next_header
+        offset += IPV6_HEADER_LEN
+        for _ in range(MAX_IPV6_EXTENSION_HEADERS):
+            if next_header not in IPV6_EXTENSION_HEADERS:
+                break
+            if len(packet) < offset + 8:
+                return None, 0, 0
+            if next_header == IPV6_FRAGMENT:
+                if ((packet[offset + 2] << 8) | packet[offset + 3]) & 0xFFF8:
+                    return None, 0, 0
+                length = 8
+            elif next_header == IPV6_AUTH:
+                length = (packet[offset + 1] + 2) * 4
+            else:
+                length = (packet[offset + 1] + 1) * 8
+            next_header = packet[offset]
+            offset += length
+        ip_header.set_protocol(next_header)
+        if next_header != IPPROTO_TCP:
+            return None, 0, 0
+        return ip_header, offset, end
@@ -6,25 +6,26 @@ managing Ethernet frame data. It uses the ctypes library for low-level data mani
 """
 
 from ctypes import *
-import socket
 
-class Ethernet(Structure):
+class Ethernet(BigEndianStructure):
     """
     Represents an Ethernet frame and provides methods to parse frame components.
 
     Attributes:
         dst (c_ubyte * 6): Destination MAC address as an array of bytes.
         src (c_ubyte * 6): Source MAC address as an array of bytes.
-        type (c_ushort): Ethernet frame type.
+        type (c_ushort): Ethernet frame type, in host byte order.
         dst_mac (str): Human-readable destination MAC address.
         src_mac (str): Human-readable source MAC address.
         proto (int): Protocol type in host byte order.
+        vlan_ids (tuple): VLAN IDs of the 802.1Q/802.1ad tags, outermost first.
     """
     _fields_ = [
         ("dst", c_ubyte * 6),
         ("src", c_ubyte * 6),
         ("type", c_ushort)
     ]
+    vlan_ids = ()
 
     def __new__(cls, socket_buffer=None):
         """
@@ -40,11 +41,38 @@ class Ethernet(Structure):
 
     def __init__(self, socket_buffer=None):
         """
-        Initializes the Ethernet frame, parsing MAC addresses and protocol type.
+        Initializes the Ethernet frame. The MAC addresses are formatted on access.
 
         Args:
             socket_buffer (bytes): Raw socket buffer containing Ethernet frame data.
         """
-        self.dst_mac = ":".join(["{:02x}".format(x) for x in self.dst])
-        self.src_mac = ":".join(["{:02x}".format(x) for x in self.src])
-        self.proto = socket.htons(self.type)
+
+    @property
+    def proto(self):
+        """
+        Returns the protocol type.
+
+        Returns:
+            int: Protocol type in host byte order.
+        """
+        return self.type
+
+    @property
+    def dst_mac(self):
+        """
+        Returns the destination MAC address.
+
+        Returns:
+            str: Human-readable destination MAC address.
+        """
+        return bytes(self.dst).hex(":")
+
+    @property
+    def src_mac(self):
+        """
+        Returns the source MAC address.
+
+        Returns:
+            str: Human-readable source MAC address.
+        """
+        return bytes(self.src).hex(":")
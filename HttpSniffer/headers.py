@@ -0,0 +1,197 @@
+"""
+Module: headers
+
+This module implements a shared header table used to deduplicate HTTP header storage.
+Header names are interned, and common name/value pairs are stored once in a bounded
+table, similar to the static and dynamic tables of HPACK. Each message keeps a tuple
+of references: a small integer ID for a pair found in the table, or a (name, value)
+literal for anything else. A pair is only indexed the second time it is seen, so
+per-message values such as request IDs do not use up the table.
+"""
+import threading
+
+STATIC_ENTRIES = (
+    ("accept", "*/*"),
+    ("accept", "application/json"),
+    ("accept", "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8"),
+    ("accept-encoding", "gzip"),
+    ("accept-encoding", "gzip, deflate"),
+    ("accept-encoding", "gzip, deflate, br"),
+    ("accept-language", "en-US,en;q=0.9"),
+    ("accept-ranges", "bytes"),
+    ("cache-control", "no-cache"),
+    ("cache-control", "max-age=0"),
+    ("connection", "close"),
+    ("connection", "keep-alive"),
+    ("content-encoding", "gzip"),
+    ("content-type", "application/json"),
+    ("content-type", "application/x-www-form-urlencoded"),
+    ("content-type", "text/html"),
+    ("content-type", "text/html; charset=utf-8"),
+    ("content-type", "text/plain"),
+    ("pragma", "no-cache"),
+    ("transfer-encoding", "chunked"),
+    ("upgrade-insecure-requests", "1"),
+    ("vary", "Accept-Encoding"),
+)
+
+NEVER_INDEXED = frozenset((
+    "age", "content-length", "content-range", "date", "etag", "expires",
+    "if-modified-since", "if-none-match", "last-modified", "range",
+))
+
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_MAX_VALUE_LENGTH = 1024
+CANDIDATES_PER_ENTRY = 4
+
+
+class HeaderTable:
+    """A bounded table of interned header names and shared name/value pairs.
+
+    The table only grows: once max_entries pairs are stored, new pairs are kept as
+    literals, so every ID handed out stays valid for the lifetime of the table. A pair
+    seen for the first time is only remembered as a candidate and is indexed on its
+    second sighting, so values unique to one message never take a slot.
+
+    Attributes:
+        entries (list): (name, value) pairs, indexed by ID. The first entries are
+            STATIC_ENTRIES.
+        entry_ids (dict): Maps a (name, value) pair to its ID.
+        candidates (dict): Pairs seen once, oldest first, bounded by max_candidates.
+        names (dict): Interned header names, bounded by max_entries.
+        max_entries (int): Maximum number of pairs in the table.
+        max_candidates (int): Maximum number of pairs remembered as seen once.
+        max_value_length (int): Longest value eligible for the table.
+        table_lock (threading.Lock): Serializes insertions.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_value_length=DEFAULT_MAX_VALUE_LENGTH,
+                 max_candidates=None):
+        """Initialize the header table with the static entries.
+
+        Args:
+            max_entries (int, optional): Maximum number of pairs in the table.
+                Defaults to 4096.
+            max_value_length (int, optional): Longest value eligible for the table.
+                Defaults to 1024.
+            max_candidates (int, optional): Maximum number of pairs remembered as seen
+                once. Defaults to four per table entry, so that a few unique values per
+                message do not push out pairs that are about to repeat.
+        """
+        self.entries = []
+        self.entry_ids = {}
+        self.candidates = {}
+        self.names = {}
+        self.max_entries = max(max_entries, len(STATIC_ENTRIES))
+        self.max_value_length = max_value_length
+        self.max_candidates = max_candidates if max_candidates is not None else CANDIDATES_PER_ENTRY * self.max_entries
+        self.table_lock = threading.Lock()
+        for name, value in STATIC_ENTRIES:
+            self.insert(self.intern_name(name), value)
+
+    def __len__(self):
+        """Return the number of pairs in the table."""
+        return len(self.entries)
+
+    def intern_name(self, name):
+        """Return the shared instance of a header name.
+
+        Args:
+            name (str): Lowercased header name.
+
+        Returns:
+            str: The interned name, or name itself once the name table is full.
+        """
+        interned = self.names.get(name)
+        if interned is None:
+            if len(self.names) >= self.max_entries:
+                return name
+            interned = self.names.setdefault(name, name)
+        return interned
+
+    def insert(self, name, value):
+        """Add a pair to the table if there is room.
+
+        Args:
+            name (str): Interned header name.
+            value (str): Header value.
+
+        Returns:
+            int: The ID of the pair, or None if the table is full.
+        """
+        with self.table_lock:
+            pair = (name, value)
+            entry_id = self.entry_ids.get(pair)
+            if entry_id is None and len(self.entries) < self.max_entries:
+                entry_id = len(self.entries)
+                self.entries.append(pair)
+                self.entry_ids[pair] = entry_id
+            return entry_id
+
+    def is_repeated(self, pair):
+        """Record a sighting of a pair and check whether it was seen before.
+
+        The first sighting adds the pair to the candidates, dropping the oldest
+        candidate once max_candidates are held; the second one removes it again.
+
+        Args:
+            pair (tuple): (name, value) pair with an interned name.
+
+        Returns:
+            bool: True if the pair was already a candidate.
+        """
+        with self.table_lock:
+            if self.candidates.pop(pair, None) is not None:
+                return True
+            if len(self.candidates) >= self.max_candidates:
+                del self.candidates[next(iter(self.candidates))]
+            self.candidates[pair] = True
+            return False
+
+    def encode(self, name, value):
+        """Encode one header as a reference.
+
+        Args:
+            name (str): Lowercased header name.
+            value (str): Header value.
+
+        Returns:
+            int or tuple: The pair ID, or a (name, value) literal with an interned name.
+        """
+        entry_id = self.entry_ids.get((name, value))
+        if entry_id is not None:
+            return entry_id
+        name = self.intern_name(name)
+        pair = (name, value)
+        if name in NEVER_INDEXED or len(value) > self.max_value_length or len(self.entries) >= self.max_entries:
+            return pair
+        if not self.is_repeated(pair):
+            return pair
+        entry_id = self.insert(name, value)
+        return entry_id if entry_id is not None else pair
+
+    def lookup(self, ref):
+        """Resolve one reference.
+
+        Args:
+            ref (int or tuple): A reference returned by encode.
+
+        Returns:
+            tuple: The (name, value) pair.
+        """
+        return self.entries[ref] if isinstance(ref, int) else ref
+
+    def expand(self, refs):
+        """Resolve a sequence of references into a header dictionary.
+
+        Args:
+            refs (iterable): References returned by encode.
+
+        Returns:
+            dict: Header names mapped to values, in the original order.
+        """
+        entries = self.entries
+        return dict(entries[ref] if isinstance(ref, int) else ref for ref in refs)
+
+
+DEFAULT_HEADER_TABLE = HeaderTable()
@@ -7,6 +7,11 @@ HTTP requests and responses. It supports parsing headers, methods, URIs, and pay
 import gzip
 from io import BytesIO
 
+from capture import describe_elision
+from headers import DEFAULT_HEADER_TABLE
+
+REQUEST_METHODS = (b'GET ', b'POST ', b'PUT ', b'DELETE ', b'HEAD ', b'OPTIONS ', b'CONNECT ', b'TRACE ', b'PATCH ')
+
 class HTTP:
     """
     Represents an HTTP message, capable of parsing both requests and responses.
@@ -18,17 +23,22 @@ class HTTP:
         version (str): The HTTP version (e.g., HTTP/1.1).
         status_code (int): The status code for responses.
         status_message (str): The status message for responses.
-        headers (dict): A dictionary of HTTP headers.
+        headers (dict): A dictionary of HTTP headers, expanded from header_refs.
+        header_refs (tuple): References into header_table, one per header.
+        header_table (HeaderTable): Shared table the header references point into.
         payload (bytes): The body of the HTTP message.
         is_response (bool): Indicates if the message is a response.
+        elision (dict): What the capture policy removed from the payload, or None.
     """
 
-    def __init__(self, raw_data):
+    def __init__(self, raw_data, header_table=DEFAULT_HEADER_TABLE):
         """
         Initializes the HTTP object by parsing the raw HTTP data.
 
         Args:
             raw_data (bytes): The raw HTTP message to be parsed.
+            header_table (HeaderTable, optional): Shared table used to store the headers.
+                Defaults to DEFAULT_HEADER_TABLE.
         """
         self.raw_data = raw_data
         self.method = None
@@ -36,11 +46,44 @@ class HTTP:
         self.version = None
         self.status_code = None
         self.status_message = None
-        self.headers = {}
+        self.header_table = header_table
+        self.header_refs = ()
         self.payload = None
         self.is_response = False
+        self.elision = None
         self.parse_http_data()
 
+    @property
+    def headers(self):
+        """
+        Returns the message headers as a dictionary.
+
+        The dictionary is rebuilt from the shared header table on every access; use
+        get_header for single lookups.
+
+        Returns:
+            dict: Lowercased header names mapped to their values.
+        """
+        return self.header_table.expand(self.header_refs)
+
+    def get_header(self, name, default=None):
+        """
+        Returns the value of a single header without building the full dictionary.
+
+        Args:
+            name (str): Lowercased header name.
+            default: Value returned when the header is absent.
+
+        Returns:
+            str: The header value, or default.
+        """
+        lookup = self.header_table.lookup
+        for ref in self.header_refs:
+            header_name, value = lookup(ref)
+            if header_name == name:
+                return value
+        return default
+
     def __str__(self):
         """
         Returns a string representation of the HTTP message, including headers and payload.
@@ -57,16 +100,17 @@ class HTTP:
             if self.method and self.uri and self.version:
                 output.append(f"HTTP Request: {self.method} {self.uri} {self.version}")
 
-        if self.headers:
+        headers = self.headers
+        if headers:
             output.append("Headers:")
-            for key, value in self.headers.items():
+            for key, value in headers.items():
                 output.append(f"  {key}: {value}")
 
         if self.payload:
             output.append("Payload:")
             try:
                 if isinstance(self.payload, bytes):
-                    if 'content-encoding' in self.headers and self.headers['content-encoding'] == 'gzip':
+                    if headers.get('content-encoding') == 'gzip':
                         try:
                             gzip_data = BytesIO(self.payload)
                             with gzip.GzipFile(fileobj=gzip_data, mode='rb') as gz:
@@ -82,6 +126,11 @@ class HTTP:
             except Exception as e:
                 output.append(f"  [Binary data - {len(self.payload)} bytes]")
 
+        if self.elision:
+            if not self.payload:
+                output.append("Payload:")
+            output.append(f"  {describe_elision(self.elision)}")
+
         return '\n'.join(output)
 
     def parse_http_data(self):
@@ -101,9 +150,7 @@ class HTTP:
 
             start_index = -1
             for i in range(len(self.raw_data)):
-                if self.raw_data[i:].startswith(b'HTTP/') or \
-                        any(self.raw_data[i:].startswith(method.encode()) for method in
-                            ['GET ', 'POST ', 'PUT ', 'DELETE ', 'HEAD ', 'OPTIONS ', 'CONNECT ', 'TRACE ', 'PATCH ']):
+                if self.raw_data.startswith(b'HTTP/', i) or self.raw_data.startswith(REQUEST_METHODS, i):
                     start_index = i
                     break
 
@@ -139,10 +186,13 @@ class HTTP:
                     self.uri = first_line_parts[1]
                     self.version = first_line_parts[2]
 
+            encode = self.header_table.encode
+            header_refs = []
             for line in lines[1:]:
                 if ': ' in line:
                     key, value = line.split(': ', 1)
-                    self.headers[key.lower()] = value
+                    header_refs.append(encode(key.lower(), value))
+            self.header_refs = tuple(header_refs)
 
             payload_start = start_index + header_end + 4
             self.payload = self.raw_data[payload_start:] if payload_start < len(self.raw_data) else None
@@ -1,17 +1,19 @@
 """
 Module: ip
 
-This module defines classes and utilities for handling and parsing IP packets. It provides
-functionality to decode IP header fields, including source and destination addresses,
-protocol, and other details.
+This module defines classes and utilities for handling and parsing IPv4 and IPv6 packets.
+It provides functionality to decode IP header fields, including source and destination
+addresses, protocol, and other details.
 """
 
 from ctypes import *
 import socket
 import struct
 
+PROTOCOL_NAMES = {1: "ICMP", 6: "TCP", 17: "UDP", 58: "ICMPv6"}
 
-class IP(Structure):
+
+class IP(BigEndianStructure):
     """
     Represents an IP packet and provides methods for parsing header fields.
 
@@ -29,8 +31,8 @@ class IP(Structure):
         dst (str): Destination IP address.
     """
     _fields_ = [
-        ("ihl", c_ubyte, 4),
         ("version", c_ubyte, 4),
+        ("ihl", c_ubyte, 4),
         ("tos", c_ubyte),
         ("len", c_ushort),
         ("id", c_ushort),
@@ -60,13 +62,141 @@ class IP(Structure):
 
     def __init__(self, socket_buffer=None):
         """
-        Initializes the IP packet, parsing source and destination addresses.
+        Initializes the IP packet. Header fields are read in network byte order.
 
         Args:
             socket_buffer (bytes): Raw socket buffer containing the IP packet.
         """
 
+    @property
+    def protocol(self):
+        """
+        Returns the protocol name.
+
+        Returns:
+            str: Protocol name, or the protocol number if it is not known.
+        """
+        return PROTOCOL_NAMES.get(self.protocol_num) or str(self.protocol_num)
+
+    @property
+    def src_address(self):
+        """
+        Returns the source address.
+
+        Returns:
+            str: Source IP address in dotted-quad notation.
+        """
+        return socket.inet_ntoa(struct.pack("!L", self.src))
+
+    @property
+    def dst_address(self):
+        """
+        Returns the destination address.
+
+        Returns:
+            str: Destination IP address in dotted-quad notation.
+        """
+        return socket.inet_ntoa(struct.pack("!L", self.dst))
+
+
+class IPv6(BigEndianStructure):
+    """
+    Represents the fixed IPv6 header and provides methods for parsing header fields.
+
+    Extension headers are not part of this structure; the decoder walks them and
+    records the upper-layer protocol in ``protocol_num``.
+
+    Attributes:
+        version (int): IP protocol version.
+        payload_len (int): Length of the payload following the fixed header.
+        next_header (int): Type of the header following the fixed header.
+        hop_limit (int): Hop limit.
+        protocol_num (int): Upper-layer protocol number.
+        protocol (str): Upper-layer protocol name.
+        src_address (str): Source IP address.
+        dst_address (str): Destination IP address.
+    """
+    _fields_ = [
+        ("vtc_flow", c_uint32),
+        ("payload_len", c_ushort),
+        ("next_header", c_ubyte),
+        ("hop_limit", c_ubyte),
+        ("src", c_ubyte * 16),
+        ("dst", c_ubyte * 16)
+    ]
+
+    def __new__(cls, socket_buffer=None):
+        """
+        Creates a new instance of the IPv6 class from a socket buffer.
+
+        Args:
+            socket_buffer (bytes): Raw socket buffer containing the IPv6 packet.
+
+        Returns:
+            IPv6: An instance of the IPv6 class.
+        """
+
+        try:
+            return cls.from_buffer_copy(socket_buffer)
+        except ValueError:
+            return None
+
+    def __init__(self, socket_buffer=None):
+        """
+        Initializes the IPv6 packet, parsing source and destination addresses.
+
+        Args:
+            socket_buffer (bytes): Raw socket buffer containing the IPv6 packet.
+        """
+
         if socket_buffer:
-            self.src_address = socket.inet_ntoa(struct.pack("<L", self.src))
-            self.dst_address = socket.inet_ntoa(struct.pack("<L", self.dst))
-            self.protocol = {1: "ICMP", 6: "TCP", 17: "UDP"}.get(self.protocol_num, str(self.protocol_num))
+            self.set_protocol(self.next_header)
+
+    @property
+    def version(self):
+        """
+        Returns the IP protocol version.
+
+        Returns:
+            int: The version field, 6 for a valid header.
+        """
+        return self.vtc_flow >> 28
+
+    @property
+    def protocol(self):
+        """
+        Returns the upper-layer protocol name.
+
+        Returns:
+            str: Protocol name, or the protocol number if it is not known.
+        """
+        return PROTOCOL_NAMES.get(self.protocol_num) or str(self.protocol_num)
+
+    @property
+    def src_address(self):
+        """
+        Returns the source address.
+
+        Returns:
+            str: Source IPv6 address.
+        """
+        return socket.inet_ntop(socket.AF_INET6, bytes(self.src))
+
+    @property
+    def dst_address(self):
+        """
+        Returns the destination address.
+
+        Returns:
+            str: Destination IPv6 address.
+        """
+        return socket.inet_ntop(socket.AF_INET6, bytes(self.dst))
+
+    def set_protocol(self, protocol_num):
+        """
+        Records the upper-layer protocol found after the extension headers.
+
+        Args:
+            protocol_num (int): Upper-layer protocol number.
+        """
+        self.protocol_num = protocol_num
@@ -0,0 +1,246 @@
+"""
+Module: overload
+
+This module implements the overload controller placed in front of HTTP parsing. When the
+smoothed decode backlog grows past a threshold, the controller switches to deterministic
+flow-hash sampling. The decision is taken once per connection, when it is first seen, so
+whole connections are either kept or dropped together. It can also apply a token-bucket
+rate limit to the requests of each client IP. The sampling rate a connection was kept at
+and the share of its client's requests admitted so far are reported with every message,
+so that counts derived from the captured messages can be scaled back up.
+"""
+import math
+import threading
+import zlib
+
+DEFAULT_BACKLOG_THRESHOLD = 1000
+DEFAULT_MIN_SAMPLE_RATE = 1 / 64
+DEFAULT_SMOOTHING = 1 / 64
+DEFAULT_MAX_SOURCES = 65536
+HASH_SPACE = 1 << 32
+
+
+def flow_hash(flow_key):
+    """Hash a connection key to a stable 32-bit value.
+
+    CRC-32 is used instead of hash() so the same flows are sampled across runs.
+
+    Args:
+        flow_key (tuple): (client, client_port, server, server_port).
+
+    Returns:
+        int: The hash value.
+    """
+    return zlib.crc32("|".join(str(part) for part in flow_key).encode())
+
+
+class OverloadController:
+    """Sheds HTTP decoding work under overload instead of losing packets at random.
+
+    The backlog is smoothed with an exponentially weighted moving average, so a burst
+    of a few packets does not move the rate. The sampling rate is 1 while the smoothed
+    backlog is at or below backlog_threshold, and halves each time it doubles beyond
+    it, down to min_sample_rate. A new connection is kept if its hash falls below
+    sample_rate * 2**32 at the time it is first seen; the decision is stored on the
+    connection and never revisited, so rate changes only affect new connections and
+    every kept connection is decoded in full.
+
+    Attributes:
+        backlog_threshold (int): Smoothed backlog above which sampling starts.
+        min_sample_rate (float): Lowest sampling rate.
+        smoothing (float): Weight of the latest measurement in the smoothed backlog.
+        rate_limit (float): Requests per second allowed per client IP, or None.
+        burst (float): Token bucket capacity per client IP.
+        max_sources (int): Maximum number of client IPs with a token bucket.
+        backlog (int): Latest measured decode backlog.
+        smoothed_backlog (float): Moving average of the decode backlog.
+        sample_rate (float): Sampling rate applied to new connections.
+        sample_bound (int): New flows hashing below this value are kept.
+        buckets (dict): Maps a client IP to its [tokens, last_refill, offered, admitted]
+            bucket, least recently used first. offered and admitted count the client's
+            requests, so that its admit rate can be reported.
+        flows_seen (int): Connections a sampling decision was taken for.
+        flows_sampled_out (int): Connections dropped by flow sampling.
+        seen (int): Messages offered to the controller.
+        admitted (int): Messages passed on to HTTP parsing.
+        sampled_out (int): Messages dropped because their connection was sampled out.
+        rate_limited (int): Requests dropped by the per-client rate limit.
+        queue_dropped (int): Packets dropped because the decode queue was full.
+        controller_lock (threading.Lock): A threading lock for thread-safe operations.
+    """
+
+    def __init__(self, backlog_threshold=DEFAULT_BACKLOG_THRESHOLD, min_sample_rate=DEFAULT_MIN_SAMPLE_RATE,
+                 rate_limit=None, burst=None, max_sources=DEFAULT_MAX_SOURCES, smoothing=DEFAULT_SMOOTHING):
+        """Initialize the overload controller.
+
+        Args:
+            backlog_threshold (int, optional): Smoothed backlog above which sampling
+                starts. Defaults to 1000.
+            min_sample_rate (float, optional): Lowest sampling rate. Defaults to 1/64.
+            rate_limit (float, optional): Requests per second allowed per client IP.
+                Defaults to no limit.
+            burst (float, optional): Token bucket capacity. Defaults to one second
+                worth of rate_limit.
+            max_sources (int, optional): Maximum number of client IPs with a token bucket.
+            smoothing (float, optional): Weight of each backlog measurement in the moving
+                average. Defaults to 1/64.
+        """
+        self.backlog_threshold = backlog_threshold
+        self.min_sample_rate = min_sample_rate
+        self.smoothing = smoothing
+        self.rate_limit = rate_limit
+        self.burst = burst if burst is not None else max(rate_limit or 0, 1)
+        self.max_sources = max_sources
+        self.backlog = 0
+        self.smoothed_backlog = 0.0
+        self.sample_rate = 1.0
+        self.sample_bound = HASH_SPACE
+        self.buckets = {}
+        self.flows_seen = 0
+        self.flows_sampled_out = 0
+        self.seen = 0
+        self.admitted = 0
+        self.sampled_out = 0
+        self.rate_limited = 0
+        self.queue_dropped = 0
+        self.controller_lock = threading.Lock()
+
+    def update_backlog(self, backlog):
+        """Record the decode backlog and adjust the sampling rate.
+
+        Args:
+            backlog (int): Packets waiting to be decoded.
+        """
+        self.backlog = backlog
+        self.smoothed_backlog += (backlog - self.smoothed_backlog) * self.smoothing
+        if self.smoothed_backlog <= self.backlog_threshold:
+            sample_rate = 1.0
+        else:
+            halvings = math.ceil(math.log2(self.smoothed_backlog / self.backlog_threshold))
+            sample_rate = max(0.5 ** halvings, self.min_sample_rate)
+        if sample_rate != self.sample_rate:
+            self.sample_rate = sample_rate
+            self.sample_bound = int(sample_rate * HASH_SPACE)
+
+    def record_drop(self):
+        """Count a packet dropped before decoding because the queue was full."""
+        self.queue_dropped += 1
+
+    def sample_flow(self, flow_key):
+        """Decide whether a new connection is decoded, at the current sampling rate.
+
+        Called once per connection, when it is first seen; the caller stores the result.
+
+        Args:
+            flow_key (tuple): (client, client_port, server, server_port) of the connection.
+
+        Returns:
+            bool: True if the messages of the connection should be parsed.
+        """
+        self.flows_seen += 1
+        if self.sample_bound < HASH_SPACE and flow_hash(flow_key) >= self.sample_bound:
+            self.flows_sampled_out += 1
+            return False
+        return True
+
+    def admit(self, flow_sampled):
+        """Count a message and decide whether it is passed on to HTTP parsing.
+
+        Args:
+            flow_sampled (bool): The decision sample_flow took for its connection.
+
+        Returns:
+            bool: True if the message should be parsed.
+        """
+        self.seen += 1
+        if not flow_sampled:
+            self.sampled_out += 1
+            return False
+        self.admitted += 1
+        return True
+
+    def admit_request(self, client, now):
+        """Charge a client request to the client's token bucket.
+
+        Only request messages sent by the client are charged; responses and body
+        segments are never rate limited. The caller charges a request before parsing
+        it, so a client over its limit costs no HTTP parsing.
+
+        Args:
+            client (str): Client IP address.
+            now (float): Monotonic capture time.
+
+        Returns:
+            bool: True if the request is within the client's rate limit.
+        """
+        if self.rate_limit is None or self.take_token(client, now):
+            return True
+        self.rate_limited += 1
+        return False
+
+    def take_token(self, client, now):
+        """Take one token from a client's bucket, refilling it first.
+
+        Args:
+            client (str): Client IP address.
+            now (float): Monotonic capture time.
+
+        Returns:
+            bool: True if a token was available.
+        """
+        with self.controller_lock:
+            bucket = self.buckets.pop(client, None)
+            if bucket is None:
+                if len(self.buckets) >= self.max_sources:
+                    del self.buckets[next(iter(self.buckets))]
+                bucket = [self.burst, now, 0, 0]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate_limit)
+                bucket[1] = now
+            self.buckets[client] = bucket
+            bucket[2] += 1
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                bucket[3] += 1
+                return True
+            return False
+
+    def admit_rate(self, client):
+        """Report the share of a client's requests that passed the rate limit.
+
+        Together with the flow sampling rate of a connection, this scales counts of the
+        client's stored requests back up.
+
+        Args:
+            client (str): Client IP address.
+
+        Returns:
+            float: Admitted over offered requests, or 1.0 without a rate limit or a
+                bucket for the client.
+        """
+        with self.controller_lock:
+            bucket = self.buckets.get(client)
+        if bucket is None or not bucket[2]:
+            return 1.0
+        return bucket[3] / bucket[2]
+
+    def stats(self):
+        """Report the controller state.
+
+        Returns:
+            dict: Backlog, current and effective sampling rates and drop counters.
+                effective_rate is the share of offered messages that were parsed.
+        """
+        return {
+            'backlog': self.backlog,
+            'smoothed_backlog': self.smoothed_backlog,
+            'sample_rate': self.sample_rate,
+            'effective_rate': self.admitted / self.seen if self.seen else 1.0,
+            'flows_seen': self.flows_seen,
+            'flows_sampled_out': self.flows_sampled_out,
+            'seen': self.seen,
+            'admitted': self.admitted,
+            'sampled_out': self.sampled_out,
+            'rate_limited': self.rate_limited,
+            'queue_dropped': self.queue_dropped,
+        }
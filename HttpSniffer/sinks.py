@@ -0,0 +1,56 @@
+"""
+Module: sinks
+
+This module provides output sinks for captured requests. A sink is any callable that
+accepts the request data dictionary produced by the packet sniffer; the classes here
+cover the common case of writing one summary line per captured message.
+"""
+import threading
+
+
+def format_summary(request_data):
+    """Build a one-line summary of a captured request.
+
+    Args:
+        request_data (dict): The request data containing all protocol layers.
+
+    Returns:
+        str: A single line describing the captured message.
+    """
+    http = request_data['http']
+    ip = request_data['ip']
+    tcp = request_data['tcp']
+    if http.is_response:
+        message = f"{http.version} {http.status_code} {http.status_message}"
+    else:
+        message = f"{http.method} {http.uri} {http.version}"
+    return f"{ip.src_address}:{tcp.sport} -> {ip.dst_address}:{tcp.dport} {message}"
+
+
+class FileSink:
+    """Writes a summary line for every captured request to a text stream.
+
+    Attributes:
+        stream: The writable text stream receiving the summaries.
+        lock (threading.Lock): Serializes writes from concurrent callers.
+    """
+
+    def __init__(self, stream):
+        """Initialize the sink.
+
+        Args:
+            stream: A writable text stream, e.g. sys.stdout or an open file.
+        """
+        self.stream = stream
+        self.lock = threading.Lock()
+
+    def __call__(self, request_data):
+        """Write the summary of a captured request.
+
+        Args:
+            request_data (dict): The request data containing all protocol layers.
+        """
+        line = format_summary(request_data)
+        with self.lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
@@ -6,10 +6,10 @@ HTTP traffic. It provides functionality for filtering packets based on various c
 and displaying captured packets through a user interface.
 
 The sniffer operates at the raw socket level and can decode multiple protocol layers
-including Ethernet, IP, TCP, and HTTP.
+including Ethernet (with VLAN tags), IPv4, IPv6, TCP, and HTTP.
 
 Example:
-    sniffer = PacketSniffer()
+    sniffer = PacketSniffer(filters={"method": "GET"}, sink=print)
     sniffer.start_ui()
     sniffer.run()
 
@@ -18,19 +18,42 @@ Command-line Arguments:
     -method VALUE  Filter packets by HTTP method (GET, POST, etc.)
     -port VALUE    Filter packets by source port
     -type VALUE    Filter packets by type (REQUEST or RESPONSE)
+    --daemon       Run headless: no UI thread and no per-packet output
+    --output PATH  Append a summary line for every captured message to PATH
+    --http-ports LIST  Comma-separated TCP ports treated as HTTP
+    --max-body SIZE    Largest HTTP body kept in full (per segment, so at most 64K applies)
+    --tail-bytes SIZE  Keep the last SIZE bytes of an oversized body as well as its head
+    --skip-type TYPE   Do not keep bodies of this content type (repeatable, "media" for images/video/audio)
+    --hash-over SIZE   Keep only a SHA-256 and length for bodies larger than SIZE
+    --max-requests N   Maximum number of stored messages (0 for no limit; 100 unless
+                       --retention or --max-memory is given)
+    --retention TIME   Keep stored messages for this long, e.g. 10m
+    --max-memory SIZE  Byte budget for stored messages, e.g. 512M
+    --sample-every N   Over budget, keep only 1 in N successful responses
+    --backlog-threshold N  Average decode backlog above which new flows are sampled
+    --rate-limit R     HTTP requests per second kept per client IP
 """
+import argparse
+import queue
 import socket
 import sys
 import threading
+import time
 
-from ether import Ethernet
-from tcp import TCP
-from ip import IP
-from http import HTTP
-from storage import RequestStorage
+from capture import DEFAULT_MAX_BODY_BYTES, MEDIA_CONTENT_TYPES, CapturePolicy, parse_size
+from conntrack import ConnectionTable
+from decoder import DEFAULT_HTTP_PORTS, PacketDecoder, parse_ports
+from http import HTTP, REQUEST_METHODS
+from overload import DEFAULT_BACKLOG_THRESHOLD, OverloadController
+from sinks import FileSink
+from storage import DEFAULT_MAX_REQUESTS, RequestStorage, parse_duration
 from ui import UI
 
 
+DEFAULT_QUEUE_SIZE = 16384
+ERROR_REPORT_INTERVAL = 10.0
+
+
 class PacketSniffer:
     """A network packet sniffer for capturing and analyzing HTTP traffic.
 
@@ -40,40 +63,183 @@ class PacketSniffer:
     Attributes:
         filters (dict): Dictionary of active filters for packet capturing
         request_store (RequestStorage): Storage for captured packets
+        sinks (list): Callables invoked with every captured request
+        verbose (bool): Whether to print a line for every captured request
+        decoder (PacketDecoder): Link, network and transport layer decoder
+        capture_policy (CapturePolicy): Limits applied to each message before it is stored
+        connections (ConnectionTable): TCP connections seen on the HTTP ports
+        overload (OverloadController): Sampling and rate limiting in front of HTTP parsing
+        packet_queue (queue.Queue): Packets read from the socket, waiting to be decoded
+        errors (int): Packets whose processing raised an exception
+        last_error_report (float): Time of the last error written to stderr, or None
         ui (UI): User interface instance for displaying captured packets
         raw_socket (socket): Raw network socket for packet capture
     """
-    def __init__(self):
-        """Initialize the PacketSniffer with filters, storage, and UI components."""
-        self.filters = self.parse_filters()
-        self.request_store = RequestStorage()
-        self.ui = UI(self.request_store)
+    def __init__(self, filters=None, storage=None, sink=None, verbose=True, http_ports=DEFAULT_HTTP_PORTS,
+                 capture_policy=None, connections=None, overload=None, queue_size=DEFAULT_QUEUE_SIZE):
+        """Initialize the PacketSniffer with filters, storage, and output sinks.
+
+        Args:
+            filters (dict, optional): Filter criteria, as returned by parse_filters.
+            storage (RequestStorage, optional): Storage for captured requests. A new
+                RequestStorage is created when omitted.
+            sink (callable or list, optional): One or more callables receiving the
+                request data of every captured request.
+            verbose (bool, optional): Print a line for every captured request. Defaults to True.
+            http_ports (iterable, optional): TCP ports treated as HTTP.
+                Defaults to DEFAULT_HTTP_PORTS.
+            capture_policy (CapturePolicy, optional): Limits applied to each message before
+                it is stored. A default CapturePolicy is used when omitted.
+            connections (ConnectionTable, optional): Connection tracking table. A new
+                ConnectionTable is created when omitted.
+            overload (OverloadController, optional): Overload controller. A default
+                OverloadController is used when omitted.
+            queue_size (int, optional): Maximum number of packets waiting to be decoded.
+        """
+        self.filters = filters or {}
+        self.request_store = storage if storage is not None else RequestStorage()
+        if sink is None:
+            self.sinks = []
+        elif callable(sink):
+            self.sinks = [sink]
+        else:
+            self.sinks = list(sink)
+        self.verbose = verbose
+        self.decoder = PacketDecoder(http_ports)
+        self.capture_policy = capture_policy if capture_policy is not None else CapturePolicy()
+        self.connections = connections if connections is not None else ConnectionTable(http_ports=http_ports)
+        self.overload = overload if overload is not None else OverloadController()
+        self.packet_queue = queue.Queue(maxsize=queue_size)
+        self.errors = 0
+        self.last_error_report = None
+        self.ui = None
         self.raw_socket = None
 
-    def parse_filters(self):
+    @staticmethod
+    def build_arg_parser():
+        """Build the command-line argument parser.
+
+        Returns:
+            argparse.ArgumentParser: Parser for the sniffer command-line arguments.
+        """
+        parser = argparse.ArgumentParser(description="Capture and analyze HTTP traffic.")
+        parser.add_argument("-ip", dest="ip", help="Filter packets by source IP address")
+        parser.add_argument("-method", dest="method", type=str.upper,
+                            help="Filter packets by HTTP method (GET, POST, etc.)")
+        parser.add_argument("-port", dest="port", type=int, help="Filter packets by source port")
+        parser.add_argument("-type", dest="type", type=str.upper, choices=["REQUEST", "RESPONSE"],
+                            help="Filter packets by type (REQUEST or RESPONSE)")
+        parser.add_argument("--daemon", action="store_true",
+                            help="Run headless: no UI thread and no per-packet output")
+        parser.add_argument("--output", metavar="PATH",
+                            help="Append a summary line for every captured message to PATH")
+        parser.add_argument("--http-ports", type=parse_ports, default=DEFAULT_HTTP_PORTS, metavar="LIST",
+                            help="Comma-separated TCP ports treated as HTTP (default: "
+                                 + ",".join(str(port) for port in sorted(DEFAULT_HTTP_PORTS)) + ")")
+        parser.add_argument("--max-body", type=parse_size, default=DEFAULT_MAX_BODY_BYTES, metavar="SIZE",
+                            help="Largest HTTP body kept in full, e.g. 4K (default: 16K). Bodies are "
+                                 "read from single segments of at most 64K, so larger values never truncate")
+        parser.add_argument("--tail-bytes", type=parse_size, default=0, metavar="SIZE",
+                            help="Keep the last SIZE bytes of an oversized body as well as its head")
+        parser.add_argument("--skip-type", action="append", default=[], metavar="TYPE",
+                            help='Do not keep bodies of this content type; "image/" matches all images '
+                                 'and "media" skips images, video and audio (repeatable)')
+        parser.add_argument("--hash-over", type=parse_size, metavar="SIZE",
+                            help="Keep only a SHA-256 and length for bodies whose Content-Length "
+                                 "exceeds SIZE")
+        parser.add_argument("--max-requests", type=int, metavar="N",
+                            help="Maximum number of stored messages, 0 for no limit (default: "
+                                 f"{DEFAULT_MAX_REQUESTS}, or no limit with --retention or --max-memory)")
+        parser.add_argument("--retention", type=parse_duration, metavar="TIME",
+                            help="Keep stored messages for this long, e.g. 10m")
+        parser.add_argument("--max-memory", type=parse_size, metavar="SIZE",
+                            help="Byte budget for stored messages, e.g. 512M")
+        parser.add_argument("--sample-every", type=int, metavar="N",
+                            help="Once over budget, keep only 1 in N successful responses; "
+                                 "error responses are always kept")
+        parser.add_argument("--backlog-threshold", type=int, default=DEFAULT_BACKLOG_THRESHOLD, metavar="N",
+                            help="Average decode backlog in packets above which new flows are sampled "
+                                 f"(default: {DEFAULT_BACKLOG_THRESHOLD})")
+        parser.add_argument("--rate-limit", type=float, metavar="R",
+                            help="HTTP requests per second kept per client IP; responses are not counted")
+        return parser
+
+    @classmethod
+    def parse_filters(cls, argv=None):
         """Parse command-line arguments to extract packet filters.
 
+        Args:
+            argv (list, optional): Arguments to parse. Defaults to sys.argv[1:].
+
         Returns:
             dict: Dictionary containing filter criteria parsed from command-line arguments.
                  Possible keys: 'ip', 'method', 'port', 'type'
         """
-        filters = {}
-        i = 1
-        while i < len(sys.argv):
-            if i + 1 < len(sys.argv):
-                flag, value = sys.argv[i], sys.argv[i + 1]
-                if flag == "-ip":
-                    filters["ip"] = value
-                elif flag == "-method":
-                    filters["method"] = value.upper()
-                elif flag == "-port":
-                    filters["port"] = int(value)
-                elif flag == "-type":
-                    filters["type"] = value.upper()
-                i += 2
+        args = cls.build_arg_parser().parse_args(argv)
+        return cls.filters_from_args(args)
+
+    @staticmethod
+    def filters_from_args(args):
+        """Extract the filter criteria from parsed command-line arguments.
+
+        Args:
+            args (argparse.Namespace): Parsed command-line arguments.
+
+        Returns:
+            dict: Dictionary containing only the filters that were given.
+        """
+        return {key: getattr(args, key) for key in ("ip", "method", "port", "type")
+                if getattr(args, key) is not None}
+
+    @staticmethod
+    def capture_policy_from_args(args):
+        """Build the capture policy from parsed command-line arguments.
+
+        Args:
+            args (argparse.Namespace): Parsed command-line arguments.
+
+        Returns:
+            CapturePolicy: The configured capture policy.
+        """
+        skip_content_types = []
+        for content_type in args.skip_type:
+            if content_type.lower() == "media":
+                skip_content_types.extend(MEDIA_CONTENT_TYPES)
             else:
-                i += 1
-        return filters
+                skip_content_types.append(content_type)
+        return CapturePolicy(max_body_bytes=args.max_body, tail_bytes=min(args.tail_bytes, args.max_body),
+                             skip_content_types=skip_content_types, hash_threshold=args.hash_over)
+
+    @staticmethod
+    def storage_from_args(args):
+        """Build the request storage from parsed command-line arguments.
+
+        The count limit defaults to DEFAULT_MAX_REQUESTS only when no time window or
+        byte budget is given, so it does not cut in ahead of the policy that was asked for.
+
+        Args:
+            args (argparse.Namespace): Parsed command-line arguments.
+
+        Returns:
+            RequestStorage: Storage configured with the requested retention policy.
+        """
+        max_size = args.max_requests
+        if max_size is None and args.retention is None and args.max_memory is None:
+            max_size = DEFAULT_MAX_REQUESTS
+        return RequestStorage(max_size=max_size or None, max_age=args.retention,
+                              max_bytes=args.max_memory, sample_every=args.sample_every)
+
+    @staticmethod
+    def overload_from_args(args):
+        """Build the overload controller from parsed command-line arguments.
+
+        Args:
+            args (argparse.Namespace): Parsed command-line arguments.
+
+        Returns:
+            OverloadController: The configured overload controller.
+        """
+        return OverloadController(backlog_threshold=args.backlog_threshold, rate_limit=args.rate_limit)
 
     def apply_filters(cls,filters, eth_header, ip_header, tcp_header, http_header):
         """Apply filters to a packet to determine if it should be captured.
@@ -108,6 +274,7 @@ class PacketSniffer:
 
     def start_ui(self):
         """Start the user interface in a separate daemon thread."""
+        self.ui = UI(self.request_store, self.connections, self.overload)
         ui_thread = threading.Thread(target=self.ui.start)
         ui_thread.daemon = True
         ui_thread.start()
@@ -115,13 +282,15 @@ class PacketSniffer:
     def initialize_socket(self):
         """Initialize the raw network socket for packet capture."""
         self.raw_socket = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.ntohs(3))
-        print("Listening for HTTP packets... Press Ctrl+C to stop.")
+        if self.verbose:
+            print("Listening for HTTP packets... Press Ctrl+C to stop.")
 
     def process_packet(self, packet):
         """Process a captured network packet.
 
         This method decodes the various protocol layers of the packet and,
-        if it matches the specified filters, stores it in the request store.
+        if the overload controller admits it and it matches the specified filters,
+        stores it in the request store and forwards it to every configured sink.
 
         Args:
             packet (bytes): Raw packet data
@@ -130,37 +299,89 @@ class PacketSniffer:
             Exception: If there's an error processing the packet
         """
         try:
-            ethernet_header = Ethernet(packet[:14])
-            ip_header = IP(packet[14:34])
-
-            if ip_header and ip_header.protocol_num == 6:
-                ip_header_length = ip_header.ihl * 4
-                tcp_header = TCP(packet[14 + ip_header_length:14 + ip_header_length + 20])
-
-                if tcp_header and (tcp_header.sport == 80 or tcp_header.dport == 80):
-                    payload_offset = 14 + ip_header_length + (tcp_header.offset * 4)
-                    payload = packet[payload_offset:]
-
-                    if payload:
-                        http_header = HTTP(payload)
-                        if http_header.headers:
-                            if self.apply_filters(self.filters, ethernet_header, ip_header, tcp_header, http_header):
-                                request_data = {
-                                    'ethernet': ethernet_header,
-                                    'ip': ip_header,
-                                    'tcp': tcp_header,
-                                    'http': http_header
-                                }
-                                idx = self.request_store.add_request(request_data)
-                                print(f"\nNew request captured (#{idx})")
+            decoded = self.decoder.decode(packet)
+            if decoded is None:
+                return
+            ethernet_header, ip_header, tcp_header, payload = decoded
+            now = time.monotonic()
+            connection = self.connections.update(ip_header, tcp_header, len(payload), now)
+            if connection.sampled is None:
+                connection.sampled = self.overload.sample_flow(connection.key)
+                connection.sample_rate = self.overload.sample_rate
+
+            if payload and self.overload.admit(connection.sampled):
+                client, client_port = connection.key[:2]
+                # Charge client requests before parsing; retransmissions were charged already.
+                if ip_header.src_address == client and tcp_header.sport == client_port \
+                        and not connection.retransmitted and payload.startswith(REQUEST_METHODS) \
+                        and not self.overload.admit_request(client, now):
+                    self.connections.note_request(connection)
+                    return
+                http_header = HTTP(payload)
+                if http_header.header_refs:
+                    if not http_header.is_response:
+                        self.connections.note_request(connection)
+                    if self.apply_filters(self.filters, ethernet_header, ip_header, tcp_header, http_header):
+                        self.capture_policy.apply(http_header)
+                        request_data = {
+                            'ethernet': ethernet_header,
+                            'ip': ip_header,
+                            'tcp': tcp_header,
+                            'http': http_header,
+                            'sample_rate': connection.sample_rate,
+                            'client_admit_rate': self.overload.admit_rate(client)
+                        }
+                        idx = self.request_store.add_request(request_data)
+                        for sink in self.sinks:
+                            sink(request_data)
+                        if self.verbose and idx is not None:
+                            print(f"\nNew request captured (#{idx})")
         except Exception as e:
-            print(f"Error processing packet: {e}")
+            self.errors += 1
+            if self.verbose:
+                print(f"Error processing packet: {e}")
+            else:
+                self.report_error(e)
+
+    def report_error(self, error):
+        """Write a processing error to stderr in headless mode.
+
+        At most one error is written per ERROR_REPORT_INTERVAL seconds, together with
+        the number of errors so far, so a persistent failure is visible without
+        flooding the log.
+
+        Args:
+            error (Exception): The exception raised while processing a packet.
+        """
+        now = time.monotonic()
+        if self.last_error_report is not None and now - self.last_error_report < ERROR_REPORT_INTERVAL:
+            return
+        self.last_error_report = now
+        print(f"Error processing packet ({self.errors} so far): {error}", file=sys.stderr)
+
+    def capture_packets(self):
+        """Read packets from the socket into the decode queue.
+
+        Runs in its own thread so the kernel buffer keeps draining while packets are
+        decoded. Packets arriving while the queue is full are counted by the overload
+        controller. A socket error is handed to the decode loop as the exception itself.
+        """
+        try:
+            while True:
+                packet, _ = self.raw_socket.recvfrom(65535)
+                try:
+                    self.packet_queue.put_nowait(packet)
+                except queue.Full:
+                    self.overload.record_drop()
+        except socket.error as e:
+            self.packet_queue.put(e)
 
     def run(self):
         """Start the packet capture process.
 
-        This method initializes the socket and begins capturing packets.
-        It continues until interrupted by the user (Ctrl+C).
+        This method initializes the socket, starts the capture thread and decodes
+        queued packets, feeding the queue length to the overload controller as the
+        decode backlog. It continues until interrupted by the user (Ctrl+C).
 
         Raises:
             socket.error: If there's an error with the network socket
@@ -168,9 +389,16 @@ class PacketSniffer:
         """
         try:
             self.initialize_socket()
-            print(f"Applied filters: {self.filters}")
+            if self.verbose:
+                print(f"Applied filters: {self.filters}")
+            capture_thread = threading.Thread(target=self.capture_packets)
+            capture_thread.daemon = True
+            capture_thread.start()
             while True:
-                packet, _ = self.raw_socket.recvfrom(65535)
+                packet = self.packet_queue.get()
+                if isinstance(packet, socket.error):
+                    raise packet
+                self.overload.update_backlog(self.packet_queue.qsize())
                 self.process_packet(packet)
         except socket.error as e:
             print(f"Socket error: {e}")
@@ -181,6 +409,29 @@ class PacketSniffer:
                 self.raw_socket.close()
 
 
-sniffer = PacketSniffer()
-sniffer.start_ui()
-sniffer.run()
\ No newline at end of file
+def main(argv=None):
+    """Command-line entry point.
+
+    Args:
+        argv (list, optional): Arguments to parse. Defaults to sys.argv[1:].
+    """
+    args = PacketSniffer.build_arg_parser().parse_args(argv)
+    output = open(args.output, "a", encoding="utf-8") if args.output else None
+    try:
+        sniffer = PacketSniffer(filters=PacketSniffer.filters_from_args(args),
+                                storage=PacketSniffer.storage_from_args(args),
+                                sink=FileSink(output) if output else None,
+                                verbose=not args.daemon,
+                                http_ports=args.http_ports,
+                                capture_policy=PacketSniffer.capture_policy_from_args(args),
+                                overload=PacketSniffer.overload_from_args(args))
+        if not args.daemon:
+            sniffer.start_ui()
+        sniffer.run()
+    finally:
+        if output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,48 +6,194 @@ persistent storage. It supports simple storage mechanisms such as files.
 """
 from collections import deque
 import threading
+import time
+
+DEFAULT_MAX_REQUESTS = 100
+MESSAGE_OVERHEAD = 1024
+
+
+def parse_duration(value):
+    """Parse a duration with an optional s, m or h suffix.
+
+    Args:
+        value (str): Duration such as "90", "90s", "10m" or "1h".
+
+    Returns:
+        float: The duration in seconds.
+
+    Raises:
+        ValueError: If the value is not a valid positive duration.
+    """
+    multipliers = {"s": 1, "m": 60, "h": 3600}
+    value = value.strip().lower()
+    multiplier = multipliers.get(value[-1:])
+    if multiplier is not None:
+        value = value[:-1]
+    seconds = float(value) * (multiplier or 1)
+    if seconds <= 0:
+        raise ValueError(f"invalid duration: {value}")
+    return seconds
+
+
+def estimate_size(request_data):
+    """Estimate the memory held by a stored request.
+
+    The estimate adds a fixed per-message overhead for the header objects and
+    containers to the variable-length parts of the HTTP message. Header pairs kept
+    in the shared header table are not counted, since they are not owned by the message.
+
+    Args:
+        request_data (dict): The request data containing all protocol layers.
+
+    Returns:
+        int: Estimated size in bytes.
+    """
+    http = request_data['http']
+    size = MESSAGE_OVERHEAD + len(http.payload or b'') + len(http.raw_data or b'') + len(http.uri or '')
+    for ref in http.header_refs:
+        if not isinstance(ref, int):
+            size += len(ref[1])
+    return size
+
+
+def is_successful_response(request_data):
+    """Check whether a stored request is a non-error HTTP response.
+
+    Args:
+        request_data (dict): The request data containing all protocol layers.
+
+    Returns:
+        bool: True for responses with a status code below 400.
+    """
+    http = request_data['http']
+    if not http.is_response:
+        return False
+    try:
+        return int(http.status_code) < 400
+    except (TypeError, ValueError):
+        return False
 
 
 class RequestStorage:
     """A thread-safe storage system for managing network requests.
 
-    This class implements a fixed-size circular buffer using collections.deque
-    to store network request data. It provides thread-safe operations for adding,
-    retrieving, and listing requests.
+    This class implements a rolling buffer using collections.deque to store network
+    request data. Requests are evicted oldest first once they fall outside the time
+    window or the storage exceeds its count or byte budget, so eviction is O(1)
+    amortized. Once the storage is over budget, successful responses can be
+    downsampled while error responses and requests are always kept.
 
     Attributes:
         requests (collections.deque): A thread-safe double-ended queue storing request data.
+        timestamps (collections.deque): Capture time of each stored request.
+        sizes (collections.deque): Estimated size of each stored request.
+        total_bytes (int): Sum of the estimated sizes of all stored requests.
+        max_size (int): Maximum number of stored requests, or None.
+        max_age (float): Seconds a request is kept, or None.
+        max_bytes (int): Byte budget for all stored requests, or None.
+        sample_every (int): Keep 1 in N successful responses while over budget, or None.
+        evicted (int): Requests removed by the retention policy.
+        successful_seen (int): Successful responses offered while over budget.
+        sampled_out (int): Successful responses dropped by downsampling.
         request_lock (threading.Lock): A threading lock for thread-safe operations.
 
     Args:
         max_size (int, optional): Maximum number of requests to store. Defaults to 100.
             When exceeded, oldest requests are automatically removed.
     """
-    def __init__(self, max_size=100):
+    def __init__(self, max_size=DEFAULT_MAX_REQUESTS, max_age=None, max_bytes=None, sample_every=None,
+                 size_of=estimate_size, clock=time.monotonic):
         """Initialize a new RequestStorage instance.
 
         Args:
             max_size (int, optional): Maximum number of requests to store. Defaults to 100.
+                None removes the count limit.
+            max_age (float, optional): Seconds a request is kept. Defaults to no limit.
+            max_bytes (int, optional): Byte budget for all stored requests. Defaults to no limit.
+            sample_every (int, optional): Keep only 1 in N successful responses while the
+                storage is over budget. Defaults to keeping all of them.
+            size_of (callable, optional): Estimates the size of a request in bytes.
+            clock (callable, optional): Returns the current time in seconds.
         """
-        self.requests = deque(maxlen=max_size)
+        self.requests = deque()
+        self.timestamps = deque()
+        self.sizes = deque()
+        self.total_bytes = 0
+        self.max_size = max_size
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.sample_every = sample_every
+        self.size_of = size_of
+        self.clock = clock
+        self.evicted = 0
+        self.sampled_out = 0
+        self.successful_seen = 0
         self.request_lock = threading.Lock()
 
     def add_request(self, request_data):
         """Add a new request to the storage.
 
-        This method is thread-safe and will add the request to the end of the deque.
-        If the deque is at maximum capacity, the oldest request will be removed.
+        This method is thread-safe and will add the request to the end of the deque,
+        then evict the oldest requests until the retention policy holds again.
 
         Args:
             request_data: The request data to store. Can be of any type.
 
         Returns:
-            int: The index where the request was stored.
+            int: The index where the request was stored, or None if it was dropped
+                by downsampling.
         """
+        now = self.clock()
+        size = self.size_of(request_data)
         with self.request_lock:
+            self.evict_expired(now)
+            if self.sample_every and self.is_over_budget(1, size) and is_successful_response(request_data):
+                self.successful_seen += 1
+                if self.successful_seen % self.sample_every:
+                    self.sampled_out += 1
+                    return None
+
             self.requests.append(request_data)
+            self.timestamps.append(now)
+            self.sizes.append(size)
+            self.total_bytes += size
+            while len(self.requests) > 1 and self.is_over_budget():
+                self.evict_oldest()
             return len(self.requests) - 1
 
+    def is_over_budget(self, extra_count=0, extra_bytes=0):
+        """Check whether the storage exceeds its count or byte budget.
+
+        Args:
+            extra_count (int, optional): Requests about to be stored.
+            extra_bytes (int, optional): Size of the requests about to be stored.
+
+        Returns:
+            bool: True if the budget is or would be exceeded.
+        """
+        if self.max_size is not None and len(self.requests) + extra_count > self.max_size:
+            return True
+        return self.max_bytes is not None and self.total_bytes + extra_bytes > self.max_bytes
+
+    def evict_oldest(self):
+        """Remove the oldest stored request."""
+        self.requests.popleft()
+        self.timestamps.popleft()
+        self.total_bytes -= self.sizes.popleft()
+        self.evicted += 1
+
+    def evict_expired(self, now):
+        """Remove the requests that fell outside the time window.
+
+        Args:
+            now (float): Current time in seconds.
+        """
+        if self.max_age is None:
+            return
+        cutoff = now - self.max_age
+        while self.timestamps and self.timestamps[0] < cutoff:
+            self.evict_oldest()
+
     def get_request(self, index):
         """Retrieve a request by its index.
 
@@ -75,4 +221,26 @@ class RequestStorage:
             list: A list of tuples (index, request_data) for all stored requests.
         """
         with self.request_lock:
-            return list(enumerate(self.requests))
\ No newline at end of file
+            self.evict_expired(self.clock())
+            return list(enumerate(self.requests))
+
+    def stats(self):
+        """Report the live usage of the storage.
+
+        Returns:
+            dict: Stored request count, estimated bytes, configured limits, the age
+                of the oldest request and the eviction and downsampling counters.
+        """
+        with self.request_lock:
+            now = self.clock()
+            self.evict_expired(now)
+            return {
+                'count': len(self.requests),
+                'bytes': self.total_bytes,
+                'max_size': self.max_size,
+                'max_bytes': self.max_bytes,
+                'max_age': self.max_age,
+                'oldest_age': now - self.timestamps[0] if self.timestamps else None,
+                'evicted': self.evicted,
+                'sampled_out': self.sampled_out,
+            }
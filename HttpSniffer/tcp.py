@@ -5,10 +5,15 @@ This module provides structures and utilities for parsing TCP headers. It enable
 of essential fields such as source and destination ports, sequence numbers, and flags.
 """
 from ctypes import *
-import socket
 
+TCP_FIN = 0x01
+TCP_SYN = 0x02
+TCP_RST = 0x04
+TCP_PSH = 0x08
+TCP_ACK = 0x10
 
-class TCP(Structure):
+
+class TCP(BigEndianStructure):
     """
     Represents a TCP segment and provides methods for parsing header fields.
 
@@ -53,12 +58,8 @@ class TCP(Structure):
 
     def __init__(self, socket_buffer):
         """
-        Initializes the TCP segment, parsing key header fields.
+        Initializes the TCP segment.
 
         Args:
             socket_buffer (bytes): Raw socket buffer containing the TCP segment.
         """
-
-        if socket_buffer:
-            self.sport = socket.ntohs(self.sport)
-            self.dport = socket.ntohs(self.dport)
@@ -8,6 +8,9 @@ protocol layers.
 from io import BytesIO
 import gzip
 import sys
+import time
+
+from capture import describe_elision
 
 class UI:
     """A command-line interface for interacting with captured network requests.
@@ -17,15 +20,21 @@ class UI:
 
     Attributes:
         request_store (RequestStorage): An instance of RequestStorage containing captured requests.
+        connections (ConnectionTable): Tracked TCP connections, or None.
+        overload (OverloadController): Overload controller of the sniffer, or None.
     """
 
-    def __init__(self, request_store):
+    def __init__(self, request_store, connections=None, overload=None):
         """Initialize the UI with a request storage instance.
 
         Args:
             request_store (RequestStorage): The storage system containing captured requests.
+            connections (ConnectionTable, optional): Tracked TCP connections.
+            overload (OverloadController, optional): Overload controller of the sniffer.
         """
         self.request_store = request_store
+        self.connections = connections
+        self.overload = overload
 
     def start(self):
         """Start the interactive command-line interface.
@@ -48,7 +57,9 @@ class UI:
         print("\nCommands:")
         print("1. List all captured requests")
         print("2. View request details")
-        print("3. Exit program")
+        print("3. Show top flows")
+        print("4. Show statistics")
+        print("5. Exit program")
 
     def handle_choice(self, choice):
         """Process the user's menu selection.
@@ -61,6 +72,11 @@ class UI:
         elif choice == "2":
             self.view_request_details()
         elif choice == "3":
+            self.list_top_flows()
+        elif choice == "4":
+            self.display_storage_stats()
+            self.display_capture_stats()
+        elif choice == "5":
             sys.exit(0)
         else:
             print("Invalid choice!")
@@ -75,6 +91,70 @@ class UI:
             else:
                 print(f"{idx}. {req['http'].method} to {req['ip'].dst_address}")
 
+    def list_top_flows(self):
+        """Display the tracked connections with the most bytes or the highest latency.
+
+        Prompts the user for the sort order.
+        """
+        if self.connections is None:
+            print("Connection tracking is not enabled!")
+            return
+        order = input("Sort by (1) bytes or (2) latency: ").strip()
+        key = "latency" if order == "2" else "bytes"
+        self.connections.expire(time.monotonic())
+        flows = self.connections.top(10, key=key)
+        print(f"\nTop flows by {key} ({len(self.connections)} tracked):")
+        if not flows:
+            print("  No flows")
+        for conn in flows:
+            print(f"  {conn}")
+
+    def display_storage_stats(self):
+        """Display the live memory usage and retention counters of the request storage."""
+        stats = self.request_store.stats()
+        print("\nStorage Usage:")
+        limit = f" of {stats['max_size']}" if stats['max_size'] else ""
+        print(f"  Messages: {stats['count']}{limit}")
+        limit = f" of {self.format_bytes(stats['max_bytes'])}" if stats['max_bytes'] else ""
+        print(f"  Memory: {self.format_bytes(stats['bytes'])}{limit} (estimated)")
+        if stats['max_age']:
+            print(f"  Retention: {stats['max_age']:.0f}s")
+        if stats['oldest_age'] is not None:
+            print(f"  Oldest message: {stats['oldest_age']:.0f}s ago")
+        print(f"  Evicted: {stats['evicted']}")
+        print(f"  Dropped by sampling: {stats['sampled_out']}")
+
+    def display_capture_stats(self):
+        """Display the decode backlog, sampling rate and drop counters."""
+        if self.overload is None:
+            return
+        stats = self.overload.stats()
+        print("\nCapture:")
+        print(f"  Decode backlog: {stats['backlog']} packets (average {stats['smoothed_backlog']:.0f})")
+        print(f"  Flow sampling rate: {stats['sample_rate']:.4g} "
+              f"({stats['flows_sampled_out']} of {stats['flows_seen']} connections dropped)")
+        print(f"  Effective rate: {stats['effective_rate']:.4g} "
+              f"({stats['admitted']} of {stats['seen']} messages decoded)")
+        print(f"  Dropped by sampling: {stats['sampled_out']}")
+        print(f"  Dropped by rate limit: {stats['rate_limited']} requests")
+        print(f"  Dropped with full queue: {stats['queue_dropped']} packets")
+
+    @staticmethod
+    def format_bytes(size):
+        """Format a byte count with a binary unit.
+
+        Args:
+            size (int): Number of bytes.
+
+        Returns:
+            str: The size in B, KiB, MiB or GiB.
+        """
+        for unit in ("B", "KiB", "MiB"):
+            if size < 1024:
+                return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+            size /= 1024
+        return f"{size:.1f} GiB"
+
     def view_request_details(self):
         """Handle the detailed view of a specific request.
 
@@ -133,6 +213,9 @@ class UI:
         print("\nEthernet Layer:")
         print(f"  Source MAC: {request['ethernet'].src_mac}")
         print(f"  Destination MAC: {request['ethernet'].dst_mac}")
+        vlan_ids = getattr(request['ethernet'], 'vlan_ids', ())
+        if vlan_ids:
+            print(f"  VLAN IDs: {', '.join(str(vlan_id) for vlan_id in vlan_ids)}")
 
     def display_ip_info(self, request):
         """Display IP layer information.
@@ -177,10 +260,16 @@ class UI:
             request (dict): The request data containing HTTP payload information.
         """
         print("\nHTTP Payload:")
-        if request['http'].payload:
-            self.handle_payload_display(request['http'])
-        else:
+        http = request['http']
+        if http.payload:
+            if http.elision and http.elision.get('tail_bytes'):
+                self.display_sampled_payload(http)
+            else:
+                self.handle_payload_display(http)
+        elif not http.elision:
             print("  No payload")
+        if http.elision:
+            print(f"  {describe_elision(http.elision)}")
 
     def handle_payload_display(self, http):
         """Handle the display of HTTP payload data, including compressed content.
@@ -190,7 +279,7 @@ class UI:
         """
         try:
             if isinstance(http.payload, bytes):
-                if 'content-encoding' in http.headers and http.headers['content-encoding'] == 'gzip':
+                if http.get_header('content-encoding') == 'gzip':
                     self.display_gzipped_payload(http.payload)
                 else:
                     print(f"  {http.payload.decode('utf-8', errors='ignore')}")
@@ -199,6 +288,17 @@ class UI:
         except Exception:
             print(f"  [Binary data - {len(http.payload)} bytes]")
 
+    def display_sampled_payload(self, http):
+        """Display a payload kept as head and tail samples.
+
+        Args:
+            http: The HTTP object whose payload holds the concatenated samples.
+        """
+        head_bytes = http.elision['head_bytes']
+        print(f"  {http.payload[:head_bytes].decode('utf-8', errors='ignore')}")
+        print("  [...]")
+        print(f"  {http.payload[head_bytes:].decode('utf-8', errors='ignore')}")
+
     def display_gzipped_payload(self, payload):
         """Display gzip-compressed payload data.
 